@@ -0,0 +1,31 @@
+from django.contrib import admin
+from .models import Invalidation, StoredFile, Task
+
+
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'refs', 'digest')
+    search_fields = ('name', 'digest')
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'priority',
+        'attempts',
+        'run_after',
+        'worker',
+    )
+    list_filter = ('status', 'name')
+    empty_value_display = '-пусто-'
+
+
+class InvalidationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'channel', 'origin', 'created')
+    list_filter = ('channel',)
+
+
+admin.site.register(Invalidation, InvalidationAdmin)
+admin.site.register(StoredFile, StoredFileAdmin)
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,158 @@
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+QUALITY = re.compile(r'q=([0-9.]+)')
+BLOCK_SIZE: int = 64 * 1024
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        match = QUALITY.search(params)
+        try:
+            quality = float(match.group(1)) if match else 1.0
+        except ValueError:
+            quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class RangeFile:
+    """Окно [start, start + length) открытого файла.
+
+    fileno() и позиция в файле остаются настоящими, поэтому WSGI-сервер
+    с wsgi.file_wrapper (gunicorn) отдаёт окно через os.sendfile без
+    копирования, ориентируясь на Content-Length ответа.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """(start, length) для одного диапазона или None - отдать файл целиком.
+
+    Несколько диапазонов в одном запросе не поддерживаются: RFC 7233
+    разрешает в таком случае ответить полным файлом.
+    """
+    match = RANGE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = min(int(last), size)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, end - start + 1
+
+
+def requested_range(request, size, etag, mtime):
+    """Диапазон из Range, если If-Range не говорит, что файл сменился."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range:
+        if if_range.startswith(('"', 'W/')):
+            fresh = if_range == etag
+        else:
+            fresh = parse_http_date_safe(if_range) == mtime
+        if not fresh:
+            return None
+    return parse_range(request.META.get('HTTP_RANGE'), size)
+
+
+def serve_file(request, full_path, *, content_type=None, encoding=None,
+               cache_control=None, offload=None):
+    """Отдаёт файл с ETag, условными запросами и диапазонами.
+
+    `offload` - пара (заголовок, значение) вроде ('X-Accel-Redirect',
+    '/protected-media/posts/a.jpg'): тогда тело отдаёт фронтенд-сервер,
+    а воркер сразу освобождается.
+    """
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    mtime = int(stat.st_mtime)
+    if content_type is None:
+        content_type = (
+            mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        response['Accept-Ranges'] = 'bytes'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if cache_control:
+            response['Cache-Control'] = cache_control
+        return response
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=mtime)
+    if not_modified is not None:
+        return finish(not_modified)
+
+    if offload is not None:
+        response = HttpResponse(content_type=content_type)
+        response[offload[0]] = offload[1]
+        return finish(response)
+
+    try:
+        byte_range = requested_range(request, stat.st_size, etag, mtime)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return finish(response)
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            RangeFile(file, start, length),
+            content_type=content_type,
+            status=206
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{stat.st_size}')
+    response.block_size = BLOCK_SIZE
+    return finish(response)
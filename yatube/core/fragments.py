@@ -0,0 +1,39 @@
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+MARKER = re.compile(rb'<!--late:(\w+)(?:\?(.*?))?-->')
+
+_renderers = {}
+
+
+def register(name):
+    """Регистрирует функцию `renderer(request, **kwargs) -> str`."""
+    def decorator(renderer):
+        _renderers[name] = renderer
+        return renderer
+    return decorator
+
+
+def marker(name, **kwargs):
+    """Метка на месте персонального фрагмента в общем HTML."""
+    query = f'?{urlencode(kwargs)}' if kwargs else ''
+    return mark_safe(f'<!--late:{name}{query}-->')
+
+
+def render_late(request, content, charset):
+    """Подставляет персональные фрагменты вместо меток."""
+    def replace(match):
+        renderer = _renderers.get(match.group(1).decode())
+        if renderer is None:
+            return match.group(0)
+        kwargs = dict(parse_qsl((match.group(2) or b'').decode()))
+        return renderer(request, **kwargs).encode(charset)
+    return MARKER.sub(replace, content)
+
+
+@register('header')
+def header(request):
+    return render_to_string('includes/header.html', request=request)
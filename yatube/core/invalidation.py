@@ -0,0 +1,166 @@
+"""Рассылка сбросов кэшей между процессами.
+
+Кэши внутри процесса (LRU резолверов, LocMemCache) не видят сбросов,
+сделанных другим воркером. Сброс записывается строкой Invalidation в
+той же транзакции, что и само изменение (ключи LocMemCache - одной
+строкой после коммита), поэтому другие процессы видят его только
+после коммита. Каждый процесс в начале запроса, не
+чаще раза в INVALIDATION_POLL_INTERVAL секунд, читает новые строки и
+вызывает подписчиков канала; свои строки он пропускает - у себя кэш
+сброшен сразу. Процесс, не читавший шину дольше
+INVALIDATION_RETENTION (строки могли быть уже удалены), сбрасывает
+все подписанные кэши целиком.
+
+Строки читаются по возрастанию id: это надёжно, пока транзакции
+записи идут по очереди, как в SQLite.
+"""
+import json
+import time
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Invalidation
+from .routers import use_primary
+from .tasks import worker_name
+
+CACHE_CHANNEL = 'cache'
+# Раз в столько сбросов удаляются строки старше INVALIDATION_RETENTION.
+PRUNE_EVERY: int = 100
+
+_subscribers = {}
+
+
+def subscribe(channel, handler):
+    """handler(payload) для сбросов из других процессов.
+
+    payload=None - процесс отстал от шины и должен сбросить всё.
+    """
+    _subscribers.setdefault(channel, []).append(handler)
+
+
+def publish(channel, payload):
+    if not settings.INVALIDATION_BUS:
+        return
+    entry = Invalidation.objects.create(
+        channel=channel, payload=json.dumps(payload), origin=worker_name())
+    if entry.id % PRUNE_EVERY == 0:
+        prune()
+
+
+def prune():
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.INVALIDATION_RETENTION)
+    Invalidation.objects.filter(created__lt=cutoff).delete()
+
+
+def cache_changed(keys):
+    """Ключи кэша Django изменены или удалены.
+
+    Другим процессам это нужно, только если кэш у каждого свой.
+    """
+    if not keys or not settings.INVALIDATION_BUS:
+        return
+    if not isinstance(caches['default'], LocMemCache):
+        return
+    if connection.in_atomic_block:
+        _pending_keys().update(keys)
+    else:
+        publish(CACHE_CHANNEL, sorted(set(keys)))
+
+
+class _PendingKeys(set):
+    """Ключи транзакции: уходят одной строкой после коммита."""
+
+    def __call__(self):
+        publish(CACHE_CHANNEL, sorted(self))
+
+
+def _pending_keys():
+    # Откат убирает колбэк из run_on_commit вместе с накопленными ключами.
+    for _, callback in connection.run_on_commit:
+        if isinstance(callback, _PendingKeys):
+            return callback
+    pending = _PendingKeys()
+    transaction.on_commit(pending)
+    return pending
+
+
+def _drop_cached(keys):
+    cache = caches['default']
+    if keys is None:
+        cache.clear()
+    else:
+        cache.delete_many(keys)
+
+
+subscribe(CACHE_CHANNEL, _drop_cached)
+
+
+def _dispatch(channel, payload):
+    for handler in _subscribers.get(channel, ()):
+        handler(payload)
+
+
+class Listener:
+    """Чтение шины одним процессом."""
+
+    def __init__(self):
+        self.last_id = None
+        self.polled = None
+        self._lock = Lock()
+
+    def poll(self, force=False):
+        if not settings.INVALIDATION_BUS:
+            return
+        now = time.monotonic()
+        interval = settings.INVALIDATION_POLL_INTERVAL
+        if not force and self.polled and now - self.polled < interval:
+            return
+        # Шину читает один поток, остальные не ждут.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            lagged = (
+                self.polled is not None
+                and now - self.polled > settings.INVALIDATION_RETENTION
+            )
+            with use_primary():
+                if self.last_id is None or lagged:
+                    self._restart(flush=lagged)
+                else:
+                    self._read()
+            self.polled = now
+        finally:
+            self._lock.release()
+
+    def _restart(self, flush):
+        last_id = Invalidation.objects.aggregate(Max('id'))['id__max']
+        self.last_id = last_id or 0
+        if flush:
+            for channel in list(_subscribers):
+                _dispatch(channel, None)
+
+    def _read(self):
+        entries = (
+            Invalidation.objects.filter(id__gt=self.last_id)
+            .values_list('id', 'channel', 'payload', 'origin')
+        )
+        me = worker_name()
+        for entry_id, channel, payload, origin in entries:
+            if origin != me:
+                _dispatch(channel, json.loads(payload))
+            self.last_id = entry_id
+
+
+listener = Listener()
+
+
+def poll_on_request(sender, **kwargs):
+    listener.poll()
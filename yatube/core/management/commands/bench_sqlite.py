@@ -0,0 +1,130 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, author_id INTEGER, text TEXT, pub_date REAL)',
+    'CREATE INDEX post_author ON post (author_id, pub_date)',
+)
+READ = (
+    'SELECT id, text FROM post WHERE author_id = ? '
+    'ORDER BY pub_date DESC LIMIT 10'
+)
+WRITE = 'INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)'
+AUTHORS: int = 100
+
+
+class Scenario:
+    """Профиль базы: прагмы и переиспользование соединения."""
+
+    def __init__(self, name, pragmas, persistent):
+        self.name = name
+        self.pragmas = pragmas
+        self.persistent = persistent
+
+    def connect(self, path):
+        connection = sqlite3.connect(path, timeout=20, isolation_level=None)
+        apply_pragmas(connection.cursor(), self.pragmas)
+        return connection
+
+
+def _worker(scenario, path, query, stop, results):
+    connection = scenario.connect(path)
+    done = errors = 0
+    while not stop.is_set():
+        if not scenario.persistent:
+            connection.close()
+            connection = scenario.connect(path)
+        try:
+            query(connection)
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    connection.close()
+    results.append((done, errors))
+
+
+def _read(connection):
+    connection.execute(READ, (random.randrange(AUTHORS),)).fetchall()
+
+
+def _write(connection):
+    connection.execute(
+        WRITE, (random.randrange(AUTHORS), 'x' * 500, time.time()))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite по умолчанию и '
+        'с настройками SQLITE_PRAGMAS при конкурентных чтениях и записях'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        scenarios = (
+            Scenario('default', {'journal_mode': 'DELETE'}, False),
+            Scenario('tuned', settings.SQLITE_PRAGMAS, True),
+        )
+        for scenario in scenarios:
+            reads, writes = self.run_scenario(scenario, options)
+            self.stdout.write(
+                f'{scenario.name:>8}: '
+                f'{reads[0] / options["seconds"]:>10.0f} чтений/с '
+                f'({reads[1]} ошибок), '
+                f'{writes[0] / options["seconds"]:>8.0f} записей/с '
+                f'({writes[1]} ошибок)'
+            )
+
+    def run_scenario(self, scenario, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            self.seed(scenario, path, options['rows'])
+            stop = threading.Event()
+            readers, writers = [], []
+            threads = [
+                threading.Thread(
+                    target=_worker,
+                    args=(scenario, path, _read, stop, readers))
+                for _ in range(options['readers'])
+            ] + [
+                threading.Thread(
+                    target=_worker,
+                    args=(scenario, path, _write, stop, writers))
+                for _ in range(options['writers'])
+            ]
+            for thread in threads:
+                thread.start()
+            time.sleep(options['seconds'])
+            stop.set()
+            for thread in threads:
+                thread.join()
+        return (
+            [sum(column) for column in zip(*readers)] or [0, 0],
+            [sum(column) for column in zip(*writers)] or [0, 0],
+        )
+
+    def seed(self, scenario, path, rows):
+        connection = scenario.connect(path)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.execute('BEGIN')
+        connection.executemany(WRITE, (
+            (random.randrange(AUTHORS), 'x' * 500, time.time())
+            for _ in range(rows)
+        ))
+        connection.execute('COMMIT')
+        connection.close()
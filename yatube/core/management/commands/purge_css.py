@@ -0,0 +1,115 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+COMMENT = re.compile(r'/\*.*?\*/', re.S)
+LICENSE = re.compile(r'/\*!.*?\*/', re.S)
+CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+TOKEN = re.compile(r'[\w-]+')
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def used_tokens(directories):
+    """Все слова из шаблонов: имя класса могло попасть в фильтр или тег."""
+    tokens = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(('.html', '.txt')):
+                    with open(os.path.join(root, name), encoding='utf-8') as f:
+                        tokens.update(TOKEN.findall(f.read()))
+    return tokens
+
+
+def split_blocks(css):
+    """Делит CSS верхнего уровня на пары (прелюдия, тело)."""
+    blocks, depth, start, prelude = [], 0, 0, ''
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude, start = css[start:index].strip(), index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:index]))
+                start = index + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css[start:index + 1].strip(), None))
+            start = index + 1
+    return blocks
+
+
+def split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def purge(css, tokens):
+    output = []
+    for prelude, body in split_blocks(css):
+        if body is None:
+            output.append(prelude)
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = purge(body, tokens)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            kept = [
+                selector for selector in split_selectors(prelude)
+                if set(CLASS.findall(selector)) <= tokens
+            ]
+            if kept:
+                output.append(f'{",".join(kept)}{{{body}}}')
+    return ''.join(output)
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из CSS правила с классами, которых нет в шаблонах '
+        'проекта, и сохраняет результат рядом с исходным файлом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source', nargs='?', default='css/bootstrap.min.css')
+        parser.add_argument(
+            'target', nargs='?', default='css/bootstrap.purged.css')
+
+    def handle(self, *args, **options):
+        static_dir = settings.STATICFILES_DIRS[0]
+        with open(os.path.join(static_dir, options['source']),
+                  encoding='utf-8') as f:
+            css = f.read()
+        license = ''.join(LICENSE.findall(css))
+        css = COMMENT.sub('', css)
+        template_dirs = [
+            directory
+            for engine in settings.TEMPLATES
+            for directory in engine['DIRS']
+        ]
+        purged = purge(css, used_tokens(template_dirs))
+        # @charset обязан стоять в самом начале файла
+        charset = ''
+        if purged.startswith('@charset'):
+            charset, _, purged = purged.partition(';')
+            charset += ';'
+        purged = f'{charset}{license}\n{purged}'
+        with open(os.path.join(static_dir, options['target']), 'w',
+                  encoding='utf-8') as f:
+            f.write(purged)
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["target"]}: {len(css)} -> {len(purged)} байт'))
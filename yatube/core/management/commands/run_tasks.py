@@ -0,0 +1,62 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import run_pending, worker_name
+
+
+def _work(batch, sleep, once):
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *args: stop.append(True))
+    worker = worker_name()
+    while not stop:
+        if run_pending(batch, worker):
+            continue
+        if once:
+            break
+        time.sleep(sleep)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Task'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-обработчиков')
+        parser.add_argument(
+            '--batch', type=int, default=settings.TASKS_BATCH,
+            help='Сколько задач брать за раз')
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться')
+
+    def handle(self, *args, processes, batch, sleep, once, **options):
+        work_args = (batch, sleep, once)
+        if processes == 1:
+            _work(*work_args)
+            return
+        # Соединения с базой не должны переходить в дочерние процессы.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_work, args=work_args)
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено обработчиков: {processes}')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
@@ -0,0 +1,220 @@
+import gzip
+import hashlib
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from .files import accepted_encodings
+from .fragments import render_late
+from .routers import use_primary
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRIMARY_UNTIL_KEY = '_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Меньшие ответы не сжимаются: выигрыш съедают заголовки.
+COMPRESS_MIN_SIZE: int = 1024
+# Сжатые тела страниц до такого размера кэшируются по хешу тела.
+COMPRESS_CACHE_MAX_SIZE: int = 512 * 1024
+COMPRESS_CACHE_TIMEOUT: int = 60 * 10
+GZIP_LEVEL: int = 6
+BROTLI_QUALITY: int = 5
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+class ReplicaRoutingMiddleware:
+    """Чтение своих записей: после записи пользователь читает из default.
+
+    Запрос с небезопасным методом целиком идёт в основную базу и
+    оставляет в сессии отметку на REPLICATION_LAG секунд, если после
+    него пользователь вошёл (в том числе этим же запросом). Пока
+    отметка жива, запросы этого пользователя тоже не идут на реплики.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Без реплик сессию не трогаем: чтение добавило бы Vary: Cookie
+        # к каждому ответу.
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        writes = request.method not in SAFE_METHODS
+        session = getattr(request, 'session', None)
+        has_cookie = settings.SESSION_COOKIE_NAME in request.COOKIES
+        # Без куки сессия пуста: её чтение лишь добавило бы Vary: Cookie.
+        sticky = (
+            session is not None
+            and has_cookie
+            and session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+        )
+        if not (writes or sticky):
+            return self.get_response(request)
+        with use_primary():
+            response = self.get_response(request)
+        if writes and session is not None and (has_cookie or session.modified):
+            # Решаем после ответа: вход и регистрация создают сессию и
+            # пользователя только в этом запросе.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                session[PRIMARY_UNTIL_KEY] = (
+                    time.time() + settings.REPLICATION_LAG)
+        return response
+
+
+class LateFragmentMiddleware:
+    """Собирает страницу: общий HTML плюс персональные фрагменты.
+
+    Страницы и их куски можно кэшировать один раз для всех
+    пользователей, а шапку, кнопку подписки и т.п. шаблоны выводят
+    меткой {% late %}, которую здесь заменяет свежий фрагмент.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or not response.get('Content-Type', '').startswith('text/html')
+            or b'<!--late:' not in response.content
+        ):
+            return response
+        response.content = render_late(
+            request, response.content, response.charset)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
+        return response
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if accepted & {'gzip', '*'}:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Сжатие потока: каждый кусок уходит клиенту сразу, не копится."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli (если установлен пакет `brotli`).
+
+    Стоит выше LateFragmentMiddleware и видит готовую страницу. Сжатое
+    тело гостевой страницы кэшируется по хешу исходного: одинаковые
+    страницы (ленты, собранные из кэшированных фрагментов) отдаются без
+    повторного сжатия, а хеш считается много быстрее сжатия. Страницы
+    вошедших пользователей не кэшируются: с личной шапкой каждая из них
+    уникальна и только вытесняла бы из кэша общие ключи. Ответы с
+    CSRF-токеном не сжимаются вовсе: по длине сжатого тела токен можно
+    подобрать (BREACH). Потоковые ответы сжимаются по кускам. Ответы с
+    диапазонами не трогаются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (request.META.get('CSRF_COOKIE_USED')
+                or not self.compressible(response)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            content = self.compressed(request, response, encoding)
+            if content is None:
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compressible(response):
+        if (
+            response.has_header('Content-Encoding')
+            or response.has_header('Accept-Ranges')
+            or response.status_code == 206
+            or not response.get('Content-Type', '').startswith(
+                COMPRESSIBLE_TYPES)
+        ):
+            return False
+        return response.streaming or len(response.content) >= COMPRESS_MIN_SIZE
+
+    @staticmethod
+    def shared(request, response):
+        """Ответ одинаков для всех: гостевой и не помечен private."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return False
+        return 'private' not in response.get('Cache-Control', '')
+
+    @staticmethod
+    def compressed(request, response, encoding):
+        """Сжатое тело или None, если сжатие не помогло."""
+        content = response.content
+        key = None
+        if (
+            CompressionMiddleware.shared(request, response)
+            and len(content) <= COMPRESS_CACHE_MAX_SIZE
+        ):
+            digest = hashlib.blake2b(content, digest_size=20).hexdigest()
+            key = f'compressed:{encoding}:{digest}'
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        compressed = compress(content, encoding)
+        if len(compressed) >= len(content):
+            return None
+        if key is not None:
+            cache.set(key, compressed, COMPRESS_CACHE_TIMEOUT)
+        return compressed
@@ -0,0 +1,65 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """Файл ContentAddressedStorage: хэш содержимого и число ссылок."""
+    digest = models.CharField('SHA-256', max_length=64, unique=True)
+    name = models.CharField('Файл', max_length=255, unique=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+
+class Task(models.Model):
+    """Отложенный вызов функции, зарегистрированной через core.tasks.task."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    args = models.TextField('Аргументы', default='[]')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED)
+    run_after = models.DateTimeField('Не раньше')
+    started = models.DateTimeField('Взята', null=True, blank=True)
+    worker = models.CharField('Обработчик', max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after']),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+
+class Invalidation(models.Model):
+    """Сброс кэша, который другие процессы читают через core.invalidation."""
+    channel = models.CharField('Канал', max_length=100)
+    payload = models.TextField('Данные', default='null')
+    origin = models.CharField('Процесс', max_length=100)
+    created = models.DateTimeField('Создан', auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.channel
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Сброс кэша'
+        verbose_name_plural = 'Сбросы кэша'
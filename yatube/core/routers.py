@@ -0,0 +1,55 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', 0) > 0
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу.
+
+    Нужен для чтений, результат которых кладётся в кэш: отстающая
+    реплика иначе вернула бы в кэш только что сброшенные данные.
+    """
+    _state.pinned = getattr(_state, 'pinned', 0) + 1
+    try:
+        yield
+    finally:
+        _state.pinned -= 1
+
+
+class ReplicaRouter:
+    """Чтения приложений из REPLICA_APPS - на реплики, остальное - в default.
+
+    Запись и все чтения внутри use_primary() идут в основную базу.
+    Если реплик в DATABASE_REPLICAS нет, роутер ничего не меняет.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or is_pinned()
+            or model._meta.app_label not in settings.REPLICA_APPS
+        ):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
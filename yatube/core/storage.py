@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.ico')
+MIN_SIZE: int = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами в именах плюс готовые .gz и .br рядом с файлами.
+
+    Сжатые копии создаются один раз при collectstatic, поэтому отдающему
+    серверу (nginx gzip_static/brotli_static или core.views.serve_static)
+    не нужно сжимать файлы на каждый запрос. Brotli - необязательная
+    зависимость: без пакета `brotli` создаются только .gz.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if isinstance(hashed_name, str):
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed:
+            if hashed_name.endswith(COMPRESSIBLE):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_SIZE:
+            return
+        variants = {'.gz': gzip.compress(content, compresslevel=9)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище без дубликатов: файлы находятся по sha256 содержимого.
+
+    Первая загрузка сохраняется под обычным именем, повторные загрузки
+    того же содержимого получают это же имя, поэтому на диске лежит одна
+    копия, а миниатюры sorl-thumbnail общие. У каждого файла есть
+    счётчик ссылок, файл удаляется, когда ссылок не остаётся.
+    """
+
+    def _save(self, name, content):
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            return self._store(name, digest.hexdigest(), temp_path)
+        finally:
+            os.remove(temp_path)
+
+    def _store(self, name, digest, temp_path):
+        stored_files = apps.get_model('core', 'StoredFile').objects
+        while True:
+            stored = stored_files.filter(digest=digest).first()
+            added = stored is not None and stored_files.filter(
+                pk=stored.pk).update(refs=F('refs') + 1)
+            if added:
+                if not self.exists(stored.name):
+                    os.link(temp_path, self.path(stored.name))
+                return stored.name
+            if stored is not None:
+                continue
+            name = self._link(name, temp_path)
+            try:
+                with transaction.atomic():
+                    stored_files.create(digest=digest, name=name, refs=1)
+                return name
+            except IntegrityError:
+                # То же содержимое параллельно сохранил другой процесс.
+                super().delete(name)
+
+    def _link(self, name, temp_path):
+        while True:
+            name = self.get_available_name(name)
+            try:
+                os.link(temp_path, self.path(name))
+                return name
+            except FileExistsError:
+                pass
+
+    def release(self, name):
+        """Снимает одну ссылку; True, если файл удалён с диска.
+
+        Файлы, которых нет в учёте (загруженные до этого хранилища),
+        не трогаются.
+        """
+        stored_files = apps.get_model('core', 'StoredFile').objects
+        with transaction.atomic():
+            stored_files.filter(name=name).update(refs=F('refs') - 1)
+            deleted, _ = stored_files.filter(name=name, refs__lte=0).delete()
+        if deleted:
+            super().delete(name)
+        return bool(deleted)
+
+    def delete(self, name):
+        self.release(name)
@@ -0,0 +1,160 @@
+"""Очередь фоновых задач в базе данных.
+
+Функция регистрируется декоратором ``task`` и ставится в очередь
+вызовом ``enqueue``; задачи выполняет ``manage.py run_tasks``. При
+TASKS_EAGER задача выполняется сразу, без очереди.
+"""
+import json
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+from .routers import use_primary
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskSpec:
+    """Зарегистрированная функция и параметры её выполнения."""
+
+    def __init__(self, func, name, batched, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.batched = batched
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def run(self, calls):
+        if self.batched:
+            self.func(calls)
+        else:
+            for args in calls:
+                self.func(*args)
+
+
+def task(name=None, *, batched=False, priority=0, max_attempts=5):
+    """Регистрирует функцию как фоновую задачу.
+
+    Пакетная задача (``batched=True``) получает один аргумент - список
+    аргументов всех взятых разом вызовов, и может их объединить.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        func.task_name = task_name
+        _registry[task_name] = TaskSpec(
+            func, task_name, batched, priority, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(func, *args, priority=None, delay=0):
+    """Ставит вызов в очередь; аргументы должны сериализоваться в JSON."""
+    spec = _registry[getattr(func, 'task_name', func)]
+    args = json.loads(json.dumps(args))
+    if settings.TASKS_EAGER:
+        spec.run([args])
+        return None
+    return Task.objects.create(
+        name=spec.name,
+        args=json.dumps(args),
+        priority=spec.priority if priority is None else priority,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(batch, worker):
+    """Забирает до `batch` готовых задач, самые приоритетные первыми.
+
+    Задачи, которые дольше TASKS_TIMEOUT числятся взятыми (обработчик
+    упал), возвращаются в работу.
+    """
+    now = timezone.now()
+    ready = Q(status=Task.QUEUED, run_after__lte=now) | Q(
+        status=Task.RUNNING,
+        started__lt=now - timedelta(seconds=settings.TASKS_TIMEOUT)
+    )
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with use_primary(), transaction.atomic():
+        ids = list(
+            Task.objects.filter(ready)
+            .select_for_update(skip_locked=skip_locked)
+            .order_by('-priority', 'run_after', 'id')
+            .values_list('id', flat=True)[:batch]
+        )
+        Task.objects.filter(ready, id__in=ids).update(
+            status=Task.RUNNING,
+            started=now,
+            worker=worker,
+            attempts=F('attempts') + 1,
+        )
+        return list(Task.objects.filter(
+            id__in=ids, status=Task.RUNNING, worker=worker, started=now))
+
+
+def run(tasks):
+    """Выполняет взятые задачи, объединяя вызовы пакетных задач.
+
+    Обычные вызовы выполняются и повторяются по одному: ошибка одного
+    не должна заново запускать уже выполненные.
+    """
+    by_name = {}
+    for claimed in tasks:
+        by_name.setdefault(claimed.name, []).append(claimed)
+    for name, group in by_name.items():
+        spec = _registry.get(name)
+        if spec is not None and spec.batched:
+            _run_group(name, spec, group)
+        else:
+            for claimed in group:
+                _run_group(name, spec, [claimed])
+
+
+def _run_group(name, spec, group):
+    try:
+        if spec is None:
+            raise LookupError(f'Задача {name} не зарегистрирована')
+        with use_primary():
+            spec.run([json.loads(claimed.args) for claimed in group])
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', name)
+        _retry(group, spec, traceback.format_exc())
+    else:
+        done = [claimed.id for claimed in group]
+        Task.objects.filter(id__in=done).delete()
+
+
+def _retry(group, spec, error):
+    max_attempts = spec.max_attempts if spec else 1
+    for claimed in group:
+        if claimed.attempts >= max_attempts:
+            claimed.status = Task.FAILED
+        else:
+            claimed.status = Task.QUEUED
+            claimed.run_after = timezone.now() + timedelta(seconds=min(
+                settings.TASKS_RETRY_DELAY * 2 ** (claimed.attempts - 1),
+                settings.TASKS_RETRY_MAX_DELAY
+            ))
+        claimed.last_error = error
+        claimed.save(update_fields=['status', 'run_after', 'last_error'])
+
+
+def run_pending(batch=None, worker=None):
+    """Выполняет одну пачку задач; возвращает число взятых задач."""
+    tasks = claim(batch or settings.TASKS_BATCH, worker or worker_name())
+    if tasks:
+        run(tasks)
+    return len(tasks)
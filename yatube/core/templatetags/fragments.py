@@ -0,0 +1,11 @@
+from django import template
+
+from core.fragments import marker
+
+register = template.Library()
+
+
+@register.simple_tag
+def late(name, **kwargs):
+    """Фрагмент, который отрисуется отдельно для каждого запроса."""
+    return marker(name, **kwargs)
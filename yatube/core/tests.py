@@ -0,0 +1,647 @@
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.core.management import call_command
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import invalidation, middleware, tasks
+from core.files import accepted_encodings
+from core.management.commands.purge_css import purge
+from core.middleware import PRIMARY_UNTIL_KEY, ReplicaRoutingMiddleware
+from core.models import Invalidation, Task
+from core.routers import ReplicaRouter, use_primary
+from core.views import serve_media, serve_static
+from posts import resolvers
+from posts.models import Group, Post
+from yatube.asgi import WsgiToAsgi, application
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task(priority=1)
+def record(value):
+    calls.append(value)
+
+
+@tasks.task()
+def record_or_fail(value):
+    if value == 'fail':
+        raise RuntimeError('fail')
+    calls.append(value)
+
+
+@tasks.task(batched=True)
+def record_batch(batch):
+    calls.append(sorted(value for value, in batch))
+
+
+@tasks.task(max_attempts=2)
+def fail():
+    raise RuntimeError('fail')
+
+
+class SQLitePragmasTests(TestCase):
+    def test_connection_is_tuned(self):
+        """Новое соединение получает прагмы из SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.user = User.objects.create_user(username='test_user')
+        self.client.force_login(self.user)
+
+    def test_reads_go_to_replica(self):
+        """Чтения постов идут на реплику, сессии - в default."""
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_use_primary_pins_reads(self):
+        """Внутри use_primary() все чтения идут в default."""
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_write_makes_session_sticky(self):
+        """После записи в сессии остаётся отметка о чтении из default."""
+        post = Post.objects.create(text='Тестовый пост', author=self.user)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            data={'text': 'Комментарий'}
+        )
+        self.assertGreater(
+            self.client.session[PRIMARY_UNTIL_KEY], time.time())
+
+    def test_login_makes_session_sticky(self):
+        """Вход без куки сессии тоже оставляет отметку."""
+        self.user.set_password('password')
+        self.user.save()
+        client = Client()
+        client.post(
+            reverse('users:login'),
+            data={'username': 'test_user', 'password': 'password'}
+        )
+        self.assertGreater(client.session[PRIMARY_UNTIL_KEY], time.time())
+
+    def test_anonymous_write_keeps_session_untouched(self):
+        """Анонимная запись не создаёт сессию."""
+        client = Client()
+        client.post(reverse('users:login'), data={'username': 'x'})
+        self.assertNotIn(PRIMARY_UNTIL_KEY, client.session)
+
+
+class NoReplicaSessionTests(TestCase):
+    def test_no_vary_cookie_without_replicas(self):
+        """Без реплик middleware не читает сессию."""
+        request = RequestFactory().get('/')
+        request.session = mock.Mock()
+        response = ReplicaRoutingMiddleware(lambda request: HttpResponse())(
+            request)
+        request.session.get.assert_not_called()
+        self.assertFalse(response.has_header('Vary'))
+
+
+class LateFragmentTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.user = User.objects.create_user(username='reader')
+
+    def test_shared_body_personal_header(self):
+        """Общий кэшированный HTML получает шапку каждого пользователя."""
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Избранные авторы')
+        self.assertNotContains(response, '<!--late:')
+
+    def test_follow_button_is_personal(self):
+        """Кнопка подписки в профиле отражает состояние читателя."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.assertContains(self.client.get(url), 'Подписаться')
+        self.client.force_login(self.user)
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertContains(self.client.get(url), 'Отписаться')
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as f:
+            f.write('.card{margin:0}' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_collect_and_serve_compressed(self):
+        """collectstatic кладёт .gz, а отдаётся он с вечным кэшем."""
+        with self.settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            hashed = staticfiles_storage.stored_name('css/site.css')
+            self.assertTrue(staticfiles_storage.exists(hashed + '.gz'))
+            request = RequestFactory().get(
+                '/static/' + hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+            response = serve_static(request, hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(body.startswith(b'.card{margin:0}'))
+        response.close()
+
+    def test_accept_encoding_qvalues(self):
+        """Кодировка с q=0 не выбирается, даже если упомянута."""
+        self.assertEqual(
+            accepted_encodings('gzip, br;q=0, deflate;q=0.5'),
+            {'gzip', 'deflate'})
+        self.assertEqual(accepted_encodings('gzip;q=0'), set())
+
+    def test_purge_keeps_used_rules(self):
+        """Очистка CSS оставляет только правила с используемыми классами."""
+        css = (
+            ':root{--x:1}.btn,.unused{color:red}.unused{color:blue}'
+            '@media (min-width:1px){.unused{top:0}.btn{top:1px}}'
+        )
+        self.assertEqual(
+            purge(css, {'btn'}),
+            ':root{--x:1}.btn{color:red}'
+            '@media (min-width:1px){.btn{top:1px}}'
+        )
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = bytes(range(256)) * 4
+        os.makedirs(os.path.join(self.root, 'posts'))
+        with open(os.path.join(self.root, 'posts', 'a.jpg'), 'wb') as f:
+            f.write(self.content)
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def get(self, **headers):
+        with self.settings(MEDIA_ROOT=self.root):
+            request = self.factory.get('/media/posts/a.jpg', **headers)
+            return serve_media(request, 'posts/a.jpg')
+
+    def read(self, response):
+        body = b''.join(response.streaming_content)
+        response.close()
+        return body
+
+    def test_full_and_conditional(self):
+        """Полный ответ несёт ETag, повторный запрос получает 304."""
+        response = self.get()
+        self.assertEqual(self.read(response), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        response = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        """Диапазоны отдаются частично, неверные - 416."""
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(self.read(response), self.content[10:20])
+        response = self.get(HTTP_RANGE='bytes=-4')
+        self.assertEqual(self.read(response), self.content[-4:])
+        response = self.get(HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_stale_if_range_gets_full_file(self):
+        """Устаревший If-Range отменяет диапазон."""
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read(response), self.content)
+
+    def test_offload_to_frontend(self):
+        """С X-Accel-Redirect тело отдаёт nginx."""
+        with self.settings(MEDIA_OFFLOAD='x-accel-redirect'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.jpg')
+        self.assertEqual(response.content, b'')
+
+    def test_offload_non_ascii_name(self):
+        """Кириллическое имя файла в заголовке кодируется процентами."""
+        with open(os.path.join(self.root, 'posts', 'фото.jpg'), 'wb') as f:
+            f.write(self.content)
+        request = self.factory.get('/')
+        with self.settings(
+                MEDIA_ROOT=self.root, MEDIA_OFFLOAD='x-accel-redirect'):
+            response = serve_media(request, 'posts/фото.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/posts/%D1%84%D0%BE%D1%82%D0%BE.jpg')
+        with self.settings(MEDIA_ROOT=self.root, MEDIA_OFFLOAD='x-sendfile'):
+            response = serve_media(request, 'posts/фото.jpg')
+        self.assertEqual(
+            response['X-Sendfile'],
+            quote(os.path.join(self.root, 'posts', 'фото.jpg')))
+
+    def test_path_traversal_is_404(self):
+        """Путь за пределами MEDIA_ROOT даёт 404."""
+        with self.settings(MEDIA_ROOT=self.root):
+            with self.assertRaises(Http404):
+                serve_media(self.factory.get('/'), '../etc/passwd')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_defers_call(self):
+        """Задача выполняется обработчиком, а не в момент постановки."""
+        tasks.enqueue(record, 'value')
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, ['value'])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_immediately(self):
+        """При TASKS_EAGER задача выполняется сразу."""
+        tasks.enqueue(record, 'value')
+        self.assertEqual(calls, ['value'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_priority_order(self):
+        """Задачи с большим приоритетом берутся первыми."""
+        tasks.enqueue(record, 'low', priority=0)
+        tasks.enqueue(record, 'high')
+        tasks.run_pending(batch=1)
+        self.assertEqual(calls, ['high'])
+
+    def test_batched_calls_merged(self):
+        """Пакетная задача получает все взятые вызовы за раз."""
+        for value in (3, 1, 2):
+            tasks.enqueue(record_batch, value)
+        tasks.run_pending()
+        self.assertEqual(calls, [[1, 2, 3]])
+
+    def test_retry_then_fail(self):
+        """Упавшая задача откладывается, затем помечается ошибкой."""
+        tasks.enqueue(fail)
+        tasks.run_pending()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.QUEUED)
+        self.assertIn('RuntimeError', failed.last_error)
+        self.assertEqual(tasks.run_pending(), 0)
+        Task.objects.update(run_after=failed.created)
+        tasks.run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_failed_call_retried_alone(self):
+        """Ошибка одного вызова не повторяет соседние."""
+        for value in (1, 'fail', 3):
+            tasks.enqueue(record_or_fail, value)
+        tasks.run_pending()
+        self.assertEqual(calls, [1, 3])
+        self.assertEqual(
+            list(Task.objects.values_list('args', flat=True)), ['["fail"]'])
+
+    def test_run_tasks_command(self):
+        """run_tasks --once разбирает очередь и завершается."""
+        tasks.enqueue(record, 'value')
+        call_command('run_tasks', once=True)
+        self.assertEqual(calls, ['value'])
+
+
+def asgi_request(app, path, body=b'', method='GET', headers=(),
+                 extensions=None, sent=None):
+    """Выполняет запрос к ASGI-приложению; возвращает статус, заголовки
+    и тело ответа."""
+    messages = [
+        {'type': 'http.request', 'body': body[:3], 'more_body': True},
+        {'type': 'http.request', 'body': body[3:]},
+    ]
+    sent = [] if sent is None else sent
+
+    async def receive():
+        if not messages:
+            # Клиент на связи, пока приложение не закончит ответ.
+            await asyncio.Event().wait()
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'q=1',
+        'headers': [(b'host', b'testserver'), *headers],
+        'extensions': extensions,
+    }
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    body = b''.join(message.get('body', b'') for message in sent[1:])
+    return start['status'], dict(start['headers']), body
+
+
+class AsgiAdapterTests(TestCase):
+    def test_wsgi_environ_and_streaming(self):
+        """Запрос доходит до WSGI-приложения, ответ отдаётся по частям."""
+        def echo(environ, start_response):
+            start_response(
+                '201 Created', [('X-Query', environ['QUERY_STRING'])])
+            yield environ['wsgi.input'].read()
+            yield environ['HTTP_X_TOKEN'].encode()
+
+        status, headers, body = asgi_request(
+            WsgiToAsgi(echo, max_workers=2), '/echo/', body=b'payload',
+            method='POST', headers=[(b'x-token', b'abc')])
+        self.assertEqual(status, 201)
+        self.assertEqual(headers[b'x-query'], b'q=1')
+        self.assertEqual(body, b'payloadabc')
+
+    def test_send_error_releases_thread(self):
+        """Ошибка отправки не оставляет поток пула висеть на очереди."""
+        def endless(environ, start_response):
+            start_response('200 OK', [])
+            for _ in range(100):
+                yield b'chunk'
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise RuntimeError('send failed')
+
+        app = WsgiToAsgi(endless, max_workers=1)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/'}
+        with self.assertRaises(RuntimeError):
+            asyncio.run(asyncio.wait_for(app(scope, receive, send), 5))
+        status, _, body = asgi_request(app, '/')
+        self.assertEqual((status, body), (200, b'chunk' * 100))
+
+    def file_app(self, path):
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Length', '7')])
+            file = open(path, 'rb')
+            file.seek(2)
+            return environ['wsgi.file_wrapper'](file)
+        return app
+
+    def test_file_sent_by_loop(self):
+        """Файл из wsgi.file_wrapper отправляет цикл, поток свободен."""
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(b'0123456789')
+            file.flush()
+            status, _, body = asgi_request(
+                WsgiToAsgi(self.file_app(file.name), max_workers=1), '/')
+        self.assertEqual((status, body), (200, b'23456789'))
+
+    def test_file_zerocopy(self):
+        """Сервер с zerocopysend получает файл, смещение и длину."""
+        sent = []
+        with tempfile.NamedTemporaryFile() as file:
+            asgi_request(
+                WsgiToAsgi(self.file_app(file.name), max_workers=1), '/',
+                extensions={'http.response.zerocopysend': {}}, sent=sent)
+        message = sent[1]
+        self.assertEqual(message['type'], 'http.response.zerocopysend')
+        self.assertEqual((message['offset'], message['count']), (2, 7))
+        self.assertTrue(message['file'].closed)
+
+    def test_disconnect_stops_streaming(self):
+        """Ушедший клиент останавливает потоковый ответ."""
+        produced = []
+
+        def endless(environ, start_response):
+            start_response('200 OK', [])
+            for i in range(10000):
+                produced.append(i)
+                time.sleep(0.001)
+                yield b'chunk'
+
+        messages = [
+            {'type': 'http.request', 'body': b''},
+            {'type': 'http.disconnect'},
+        ]
+
+        async def receive():
+            if len(messages) == 1:
+                await asyncio.sleep(0.05)
+            return messages.pop(0)
+
+        async def send(message):
+            pass
+
+        app = WsgiToAsgi(endless, max_workers=1)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/'}
+        asyncio.run(asyncio.wait_for(app(scope, receive, send), 5))
+        self.assertLess(len(produced), 10000)
+
+    def test_django_page(self):
+        """Страницы Django отдаются через ASGI."""
+        status, headers, body = asgi_request(
+            application, reverse('about:author'))
+        self.assertEqual(status, 200)
+        self.assertIn('text/html', headers[b'content-type'].decode())
+
+
+@override_settings(INVALIDATION_BUS=True)
+class InvalidationBusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listener = invalidation.Listener()
+        self.listener.poll()
+
+    def foreign(self, channel, payload):
+        Invalidation.objects.create(
+            channel=channel, payload=json.dumps(payload), origin='other:1')
+
+    def test_foreign_cache_keys_dropped(self):
+        """Ключи, сброшенные другим процессом, удаляются и здесь."""
+        cache.set('stale', 1)
+        self.foreign(invalidation.CACHE_CHANNEL, ['stale'])
+        self.listener.poll(force=True)
+        self.assertIsNone(cache.get('stale'))
+
+    def test_own_entries_skipped(self):
+        """Свои сбросы процесс повторно не применяет."""
+        received = []
+        invalidation.subscribe('test.own', received.append)
+        self.addCleanup(invalidation._subscribers.pop, 'test.own')
+        invalidation.publish('test.own', [1])
+        self.foreign('test.own', [2])
+        self.listener.poll(force=True)
+        self.assertEqual(received, [[2]])
+
+    def test_poll_rate_limited(self):
+        """Между опросами шины запросов к базе нет."""
+        with self.assertNumQueries(0):
+            self.listener.poll()
+
+    def test_lagging_process_flushes(self):
+        """Процесс, давно не читавший шину, сбрасывает кэш целиком."""
+        cache.set('stale', 1)
+        self.listener.polled -= settings.INVALIDATION_RETENTION + 1
+        self.listener.poll()
+        self.assertIsNone(cache.get('stale'))
+
+    def test_keys_of_transaction_published_once(self):
+        """Ключи одной транзакции уходят одной строкой после коммита."""
+        with transaction.atomic():
+            invalidation.cache_changed(['a'])
+            invalidation.cache_changed(['b', 'a'])
+            callbacks = [
+                callback for _, callback in connection.run_on_commit
+                if isinstance(callback, invalidation._PendingKeys)
+            ]
+            self.assertEqual(callbacks, [{'a', 'b'}])
+        self.assertFalse(Invalidation.objects.exists())
+
+    def test_resolver_entries_dropped(self):
+        """Сброс группы другим процессом убирает её из резолвера."""
+        group = Group.objects.create(title='Группа', slug='bus_group')
+        resolvers.groups.get_or_404('bus_group')
+        self.foreign('resolvers.groups', [group.pk, 'bus_group'])
+        self.listener.poll(force=True)
+        self.assertIsNone(resolvers.groups.cache.get('bus_group'))
+
+
+class CompressionMiddlewareTests(TestCase):
+    body = ('<p>Тестовый текст поста</p>' * 200).encode()
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def get(self, response, accept='gzip, deflate', user=None, **extra):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept, **extra)
+        if user is not None:
+            request.user = user
+        return middleware.CompressionMiddleware(lambda request: response)(
+            request)
+
+    def test_html_gzipped(self):
+        """Большая страница сжимается, Vary учитывает Accept-Encoding."""
+        response = self.get(HttpResponse(self.body))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content))
+
+    def test_same_body_not_recompressed(self):
+        """Одинаковое тело второй раз берётся из кэша."""
+        self.get(HttpResponse(self.body))
+        with mock.patch('core.middleware.gzip.compress') as compress:
+            response = self.get(HttpResponse(self.body))
+        compress.assert_not_called()
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_personal_body_not_cached(self):
+        """Страницы вошедшего пользователя и private не кладутся в кэш."""
+        private = HttpResponse(self.body)
+        private['Cache-Control'] = 'private'
+        user = get_user_model()(username='reader')
+        cases = ((HttpResponse(self.body), user), (private, None))
+        for response, user in cases:
+            with self.subTest(user=user):
+                cache.clear()
+                content = response.content
+                self.get(response, user=user)
+                with mock.patch(
+                        'core.middleware.gzip.compress',
+                        wraps=gzip.compress) as compress:
+                    self.get(HttpResponse(content), user=user)
+                compress.assert_called_once()
+
+    def test_csrf_body_not_compressed(self):
+        """Ответ с CSRF-токеном не сжимается (защита от BREACH)."""
+        response = self.get(HttpResponse(self.body), CSRF_COOKIE_USED=True)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_not_compressed(self):
+        """Без gzip в Accept-Encoding, мелкие и сжатые ответы - как есть."""
+        compressed = HttpResponse(self.body)
+        compressed['Content-Encoding'] = 'gzip'
+        cases = (
+            (HttpResponse(self.body), ''),
+            (HttpResponse(self.body), 'gzip;q=0, identity'),
+            (HttpResponse(b'<p>short</p>'), 'gzip'),
+            (HttpResponse(self.body, content_type='image/png'), 'gzip'),
+            (compressed, 'gzip'),
+        )
+        for response, accept in cases:
+            with self.subTest(accept=accept):
+                content = response.content
+                response = self.get(response, accept)
+                self.assertEqual(response.content, content)
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается по кускам."""
+        response = self.get(StreamingHttpResponse(
+            iter([self.body, self.body])))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            self.body * 2)
+
+    @unittest.skipIf(middleware.brotli is None, 'нет пакета brotli')
+    def test_brotli_preferred(self):
+        """При поддержке клиентом выбирается brotli."""
+        response = self.get(HttpResponse(self.body), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            middleware.brotli.decompress(response.content), self.body)
+
+    def test_gzip_without_brotli(self):
+        """Без пакета brotli клиент с br получает gzip."""
+        with mock.patch.object(middleware, 'brotli', None):
+            response = self.get(HttpResponse(self.body), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_page_compressed(self):
+        """Страницы сайта отдаются сжатыми."""
+        response = self.client.get(
+            reverse('about:author'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
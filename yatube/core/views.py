@@ -1,4 +1,21 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from .files import accepted_encodings, serve_file
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
 
 
 def page_not_found(request, exception):
@@ -17,3 +34,63 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def _resolve(root, path):
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    return full_path
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику с заранее сжатыми вариантами.
+
+    Файлы с хешем в имени никогда не меняются, поэтому браузеру
+    разрешено кэшировать их навсегда.
+    """
+    full_path = _resolve(settings.STATIC_ROOT, path)
+    content_type = mimetypes.guess_type(full_path)[0]
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + suffix):
+            encoding, full_path = name, full_path + suffix
+            break
+    response = serve_file(
+        request,
+        full_path,
+        content_type=content_type,
+        encoding=encoding,
+        cache_control=IMMUTABLE if HASHED_NAME.search(path) else None
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def serve_media(request, path):
+    """Отдаёт загруженные файлы.
+
+    При MEDIA_OFFLOAD тело отдаёт nginx (X-Accel-Redirect) или
+    Apache/lighttpd (X-Sendfile), иначе - serve_file с диапазонами.
+    Путь в заголовке кодируется процентами: не-ASCII значение Django
+    закодировал бы по RFC 2047, и сервер не нашёл бы файл.
+    """
+    full_path = _resolve(settings.MEDIA_ROOT, path)
+    offload = None
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        offload = (
+            'X-Accel-Redirect',
+            quote(settings.MEDIA_OFFLOAD_LOCATION + path)
+        )
+    elif settings.MEDIA_OFFLOAD == 'x-sendfile':
+        offload = ('X-Sendfile', quote(full_path))
+    return serve_file(
+        request,
+        full_path,
+        cache_control=MEDIA_CACHE_CONTROL,
+        offload=offload
+    )
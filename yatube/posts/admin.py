@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, Group, Follow, Comment
+from .models import Post, Group, Follow, Comment, Trend
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,7 +17,7 @@ class PostAdmin(admin.ModelAdmin):
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'description', 'slug')
+    list_display = ('pk', 'title', 'description', 'slug', 'posts_count')
     search_fields = ('title',)
     empty_value_display = '-пусто-'
 
@@ -30,7 +30,13 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
 
 
+class TrendAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'post', 'group', 'score', 'updated')
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(Trend, TrendAdmin)
@@ -0,0 +1,191 @@
+"""Фильтр Блума существующих ключей из URL и кэш промахов.
+
+Боты перебирают /profile/<имя>/, /group/<slug>/ и /posts/<id>/ со
+случайными значениями. Ключ, которого нет в фильтре, точно не
+существует - 404 отдаётся без запроса к базе. Ложные срабатывания
+фильтра (и удалённые объекты) после одного запроса к базе попадают
+в кэш промахов на MISSING_TIMEOUT секунд.
+
+Фильтр строится в каждом процессе при первой проверке. Новые ключи
+добавляются в него сразу, а другим процессам об этом говорит версия
+в кэше (при LocMemCache её сброс разносит core.invalidation):
+фильтр перестраивается, когда на «нет» версия уже другая. id постов
+растут: id больше загруженного в фильтр сверяются с общим максимумом
+в кэше, а всё, что выше него больше чем на MONOTONIC_SLACK, - 404 без
+запроса.
+"""
+import hashlib
+import math
+import time
+from threading import Lock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from core import invalidation
+from core.routers import use_primary
+
+from .models import Group, Post, User
+
+MISSING_TIMEOUT: int = 60
+ERROR_RATE: float = 0.01
+# Запас под ключи, добавленные после постройки, и минимальный размер.
+CAPACITY_FACTOR: int = 2
+MIN_CAPACITY: int = 1024
+# Запас над общим максимумом id: гонка двух процессов при его записи
+# может занизить максимум на несколько новых постов.
+MONOTONIC_SLACK: int = 1000
+
+
+class BloomFilter:
+    """Множество без удаления с вероятностью ложного «есть» error_rate."""
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Двойное хеширование: k позиций из двух половин одного хеша.
+        digest = hashlib.blake2b(
+            str(key).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class KeySet:
+    """Существующие значения поля модели: фильтр Блума и кэш промахов.
+
+    `monotonic` - значения только растут (автоинкрементный id):
+    значения больше загруженного максимума сверяются с общим
+    максимумом в кэше.
+    """
+
+    def __init__(self, model, field, monotonic=False):
+        self.model = model
+        self.field = field
+        self.monotonic = monotonic
+        self.name = f'{model._meta.db_table}.{field}'
+        self._lock = Lock()
+        # (фильтр, максимум, версия) - меняется целиком.
+        self._state = None
+
+    @property
+    def version_key(self):
+        return f'keys:v:{self.name}'
+
+    @property
+    def largest_key(self):
+        return f'keys:max:{self.name}'
+
+    def missing_key(self, key):
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        return f'keys:m:{self.name}:{digest}'
+
+    def _version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = time.time_ns()
+            cache.set(self.version_key, version, None)
+        return version
+
+    def _build(self, version):
+        with use_primary():
+            keys = list(
+                self.model._default_manager
+                .values_list(self.field, flat=True)
+            )
+        bloom = BloomFilter(max(len(keys) * CAPACITY_FACTOR, MIN_CAPACITY))
+        for key in keys:
+            bloom.add(key)
+        largest = max(keys, default=None) if self.monotonic else None
+        self._state = (bloom, largest, version)
+
+    def _largest(self):
+        largest = cache.get(self.largest_key)
+        if largest is None:
+            with use_primary():
+                largest = self.model._default_manager.aggregate(
+                    largest=Max(self.field))['largest'] or 0
+            cache.set(self.largest_key, largest, None)
+        return largest
+
+    def _absent(self, key):
+        bloom, largest, _ = self._state
+        if self.monotonic and (largest is None or key > largest):
+            return key > self._largest() + MONOTONIC_SLACK
+        return key not in bloom
+
+    def might_exist(self, key):
+        """False - значения в базе точно нет; True - надо проверить."""
+        if self._state is None or self._absent(key):
+            version = self._version()
+            with self._lock:
+                if self._state is None or self._state[2] != version:
+                    self._build(version)
+            return not self._absent(key)
+        return True
+
+    def is_missing(self, key):
+        """Значение недавно искали в базе и не нашли."""
+        return cache.get(self.missing_key(key)) is not None
+
+    def missing(self, key):
+        cache.set(self.missing_key(key), True, MISSING_TIMEOUT)
+
+    def added(self, key):
+        """Новое значение: в свой фильтр сразу, другим - через версию."""
+        state = self._state
+        if state is not None:
+            state[0].add(key)
+        missing_key = self.missing_key(key)
+        self._after_commit(lambda: cache.delete(missing_key))
+        invalidation.cache_changed([missing_key])
+        if not self.monotonic:
+            self.invalidate()
+            return
+        largest = cache.get(self.largest_key)
+        if largest is not None and key > largest:
+            cache.set(self.largest_key, key, None)
+            invalidation.cache_changed([self.largest_key])
+
+    def removed(self, key):
+        transaction.on_commit(lambda: self.missing(key))
+
+    def invalidate(self):
+        """Фильтры всех процессов перестроятся при следующем «нет»."""
+        self._after_commit(
+            lambda: cache.set(self.version_key, time.time_ns(), None))
+        keys = [self.version_key]
+        if self.monotonic:
+            # Максимум пересчитается из базы при следующей проверке.
+            self._after_commit(lambda: cache.delete(self.largest_key))
+            keys.append(self.largest_key)
+        invalidation.cache_changed(keys)
+
+    @staticmethod
+    def _after_commit(action):
+        action()
+        # Повторно после коммита: другой процесс мог успеть прочитать
+        # базу до коммита.
+        transaction.on_commit(action)
+
+
+usernames = KeySet(User, 'username')
+group_slugs = KeySet(Group, 'slug')
+post_ids = KeySet(Post, 'id', monotonic=True)
+
+KEY_SETS = {User: usernames, Group: group_slugs, Post: post_ids}
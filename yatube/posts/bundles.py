@@ -0,0 +1,120 @@
+import time
+
+from django.core.cache import cache
+from django.http import Http404
+
+from core import invalidation
+from core.routers import use_primary
+
+from . import bloom, caching, resolvers
+from .models import Comment, Post
+from .paginators import LoadedPaginator
+
+BUNDLE_TIMEOUT: int = 60 * 15
+COMMENTS_PAGE: int = 50
+
+
+def bundle_key(post_id):
+    return f'post_bundle:{post_id}'
+
+
+def author_posts_key(author_id):
+    return f'author_posts:{author_id}'
+
+
+def comments_key(post_id, version, number):
+    return f'post_comments:{post_id}:{version}:{number}'
+
+
+def _load_comments(post_id, number):
+    start = (number - 1) * COMMENTS_PAGE
+    return list(
+        Comment.objects.filter(post_id=post_id)
+        .select_related('author')
+        .order_by('created', 'id')[start:start + COMMENTS_PAGE]
+    )
+
+
+def _build_bundle(post_id):
+    if bloom.post_ids.is_missing(post_id):
+        raise Http404('Пост не найден')
+    post = Post.objects.select_related('group').filter(id=post_id).first()
+    if post is None:
+        bloom.post_ids.missing(post_id)
+        raise Http404('Пост не найден')
+    return {
+        'post': post,
+        'comments': _load_comments(post_id, 1),
+        'comments_count': Comment.objects.filter(post_id=post_id).count(),
+        # Следующие страницы комментариев лежат под ключами с этой
+        # версией: сброс пакета сбрасывает и их.
+        'version': time.time_ns(),
+    }
+
+
+def _count_posts(author_id):
+    return Post.objects.filter(author_id=author_id).count()
+
+
+def _on_primary(build, *args):
+    with use_primary():
+        return build(*args)
+
+
+def get_bundle(post_id):
+    """Всё для страницы поста: пост, группа, автор, счётчик и комментарии.
+
+    Пост с группой и первая страница комментариев лежат в кэше одним
+    значением, число постов автора - отдельным ключом, чтобы новый пост
+    автора не сбрасывал страницы всех его постов. Остальные страницы
+    комментариев кэшируются по одной (comments_page). Автор берётся из
+    кэша пользователей. При тёплом кэше запросов к базе нет.
+    """
+    if not bloom.post_ids.might_exist(post_id):
+        raise Http404('Пост не найден')
+    bundle = caching.get_or_compute(
+        bundle_key(post_id), lambda: _on_primary(_build_bundle, post_id),
+        BUNDLE_TIMEOUT)
+    post = bundle['post']
+    author = resolvers.users.by_id(post.author_id).as_user()
+    post.author = author
+    number_of_posts = caching.get_or_compute(
+        author_posts_key(author.id),
+        lambda: _on_primary(_count_posts, author.id), BUNDLE_TIMEOUT)
+    return dict(bundle, author=author, number_of_posts=number_of_posts)
+
+
+def comments_page(post_id, bundle, number):
+    """Страница комментариев к посту; первая уже лежит в пакете."""
+    def load(number):
+        if number == 1:
+            return bundle['comments']
+        return caching.get_or_compute(
+            comments_key(post_id, bundle['version'], number),
+            lambda: _on_primary(_load_comments, post_id, number),
+            BUNDLE_TIMEOUT)
+
+    paginator = LoadedPaginator(load, COMMENTS_PAGE, bundle['comments_count'])
+    return paginator.get_page(number)
+
+
+def invalidate_posts(post_ids):
+    keys = [bundle_key(post_id) for post_id in post_ids]
+    cache.delete_many(keys)
+    invalidation.cache_changed(keys)
+
+
+def invalidate_author(author_id):
+    key = author_posts_key(author_id)
+    cache.delete(key)
+    invalidation.cache_changed([key])
+
+
+def invalidate_commenter(author_id):
+    """Пакеты постов, где комментировал пользователь: в них его имя."""
+    with use_primary():
+        post_ids = list(
+            Comment.objects.filter(author_id=author_id)
+            .values_list('post_id', flat=True).distinct()
+        )
+    invalidate_posts(post_ids)
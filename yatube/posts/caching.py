@@ -0,0 +1,94 @@
+"""Кэш без «лавины» пересчётов при истечении горячих ключей.
+
+Значение хранится вместе со временем вычисления и сроком годности.
+После срока оно ещё STALE_FACTOR * timeout лежит в кэше: пока один
+поток (single-flight, блокировка через cache.add) пересчитывает
+значение, остальные отдают старое. Пересчёт начинается немного
+раньше срока с вероятностью, растущей к его концу (XFetch), поэтому
+горячий ключ обычно обновляется до того, как истечёт.
+
+Блокировка лежит в том же кэше, что и значение, и видна тем же, кому
+видно значение. С LocMemCache (как в settings.CACHES) и кэш, и
+блокировка у каждого процесса свои: ключ пересчитывает один поток
+на процесс, то есть при истечении в базу придёт не больше запросов,
+чем воркеров. Один пересчёт на все процессы даёт только общий кэш с
+атомарным add (Memcached, Redis, DatabaseCache).
+"""
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+# Сколько (в долях timeout) просроченное значение можно отдавать,
+# пока его пересчитывают.
+STALE_FACTOR: float = 1.0
+# Больше - раньше начинается упреждающий пересчёт.
+XFETCH_BETA: float = 1.0
+LOCK_TIMEOUT: int = 30
+# Сколько ждать чужого вычисления, если старого значения нет.
+WAIT_TIMEOUT: float = 2.0
+WAIT_STEP: float = 0.05
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _is_fresh(entry, now, beta):
+    _, delta, expires = entry
+    # -log(random()) > 0: чем дольше считается значение, тем раньше
+    # его начинают обновлять.
+    return now - delta * beta * math.log(1 - random.random()) < expires
+
+
+def _compute(key, compute, timeout):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    if timeout is None:
+        cache.set(key, (value, delta, math.inf), None)
+    else:
+        expires = time.time() + timeout
+        stale = timeout + int(timeout * STALE_FACTOR)
+        cache.set(key, (value, delta, expires), stale)
+    return value
+
+
+def _compute_locked(key, compute, timeout):
+    try:
+        return _compute(key, compute, timeout)
+    finally:
+        cache.delete(_lock_key(key))
+
+
+def _wait(key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_compute(key, compute, timeout, beta=XFETCH_BETA):
+    """Значение ключа из кэша; при промахе - compute() в одном потоке.
+
+    Один на кэш: с LocMemCache - один на процесс (см. описание модуля).
+
+    Удаление ключа (cache.delete) по-прежнему сбрасывает значение
+    сразу: тогда первый запрос считает его, а остальные ждут до
+    WAIT_TIMEOUT и только потом считают сами.
+    """
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, time.time(), beta):
+        return entry[0]
+    if cache.add(_lock_key(key), True, LOCK_TIMEOUT):
+        return _compute_locked(key, compute, timeout)
+    if entry is not None:
+        return entry[0]
+    entry = _wait(key)
+    if entry is not None:
+        return entry[0]
+    return _compute(key, compute, timeout)
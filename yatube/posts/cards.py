@@ -0,0 +1,70 @@
+import time
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core import invalidation
+
+from . import thumbnails
+
+CARD_TIMEOUT: int = 60 * 60
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def _version_key(kind, pk):
+    return f'card_v:{kind}:{pk}'
+
+
+def _version_keys(post):
+    return (
+        _version_key('post', post.id),
+        _version_key('user', post.author_id),
+        _version_key('group', post.group_id),
+    )
+
+
+def bump(kind, pk):
+    """Меняет штамп версии: все карточки с ним станут промахами."""
+    key = _version_key(kind, pk)
+    cache.set(key, time.time_ns(), None)
+    invalidation.cache_changed([key])
+
+
+def render_cards(posts, is_profile=False):
+    """HTML карточек постов, по возможности из кэша.
+
+    Ключ карточки включает штампы версий поста, автора и группы,
+    поэтому правка любого из них сразу даёт новую карточку, а старая
+    просто истекает. Вся страница - три обращения к кэшу, миниатюры
+    для промахов читаются ещё одним (posts.thumbnails).
+    """
+    posts = list(posts)
+    version_keys = {key for post in posts for key in _version_keys(post)}
+    versions = cache.get_many(version_keys)
+    missing = {key: time.time_ns() for key in version_keys - versions.keys()}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    card_keys = [
+        'card:{}:{}:{}'.format(
+            post.id,
+            int(is_profile),
+            ':'.join(str(versions[key]) for key in _version_keys(post))
+        )
+        for post in posts
+    ]
+    cards = cache.get_many(card_keys)
+    misses = [
+        (post, key) for post, key in zip(posts, card_keys)
+        if key not in cards
+    ]
+    images = thumbnails.resolve(post.image for post, _ in misses)
+    rendered = {}
+    for post, key in misses:
+        post.thumbnail = images.get(post.image.name)
+        rendered[key] = render_to_string(
+            CARD_TEMPLATE, {'post': post, 'is_profile': is_profile})
+    if rendered:
+        cache.set_many(rendered, CARD_TIMEOUT)
+        cards.update(rendered)
+    return [cards[key] for key in card_keys]
@@ -0,0 +1,62 @@
+import json
+
+from core.routers import use_primary
+
+from . import resolvers
+from .models import Group, Post
+from .paginators import KeysetPaginator
+
+PREVIEW_SIZE: int = 3
+PREVIEW_LENGTH: int = 100
+
+
+def refresh_group_stats(group_ids):
+    """Пересчитывает агрегаты групп по индексу (group, -pub_date)."""
+    for group_id in filter(None, group_ids):
+        with use_primary():
+            posts = Post.objects.filter(group_id=group_id)
+            newest = list(
+                posts.order_by('-pub_date', '-id')
+                .values('id', 'text', 'pub_date')[:PREVIEW_SIZE]
+            )
+            count = posts.count()
+        preview = [
+            {
+                'id': post['id'],
+                'text': post['text'][:PREVIEW_LENGTH],
+                'pub_date': post['pub_date'].isoformat(),
+            }
+            for post in newest
+        ]
+        Group.objects.filter(pk=group_id).update(
+            posts_count=count,
+            last_post_date=newest[0]['pub_date'] if newest else None,
+            preview=json.dumps(preview, ensure_ascii=False),
+        )
+        resolvers.groups.invalidate(group_id)
+
+
+def refresh_group_counts(group_ids):
+    """Только число постов: одним COUNT по индексу, без превью.
+
+    Число нужно сразу - от него зависят пагинатор ленты группы и ключ
+    её кэша, а превью и дату можно досчитать в фоне.
+    """
+    for group_id in filter(None, group_ids):
+        with use_primary():
+            count = Post.objects.filter(group_id=group_id).count()
+        Group.objects.filter(pk=group_id).update(posts_count=count)
+        resolvers.groups.invalidate(group_id)
+
+
+def rebuild_group_stats():
+    """Полный пересчёт, например после ручной правки базы."""
+    refresh_group_stats(Group.objects.values_list('id', flat=True))
+
+
+def group_directory(per_page, after=None):
+    """Страница каталога групп, отсортированного по названию."""
+    groups = Group.objects.only(
+        'title', 'slug', 'posts_count', 'last_post_date', 'preview'
+    )
+    return KeysetPaginator(groups, per_page, 'title').page(after)
@@ -0,0 +1,76 @@
+from django.db import transaction
+
+from core.routers import use_primary
+
+from .models import FeedEntry, Post
+
+SYNC_CHUNK: int = 500
+
+
+def entry_for(post):
+    """Строка ленты для поста с загруженными автором и группой."""
+    author, group = post.author, post.group
+    return FeedEntry(
+        post_id=post.id,
+        pub_date=post.pub_date,
+        author_id=author.id,
+        author_username=author.username,
+        author_first_name=author.first_name,
+        author_last_name=author.last_name,
+        group_id=group.id if group else None,
+        group_slug=group.slug if group else '',
+        group_title=group.title if group else '',
+        excerpt=post.excerpt,
+        image=post.image.name or '',
+        image_color=post.image_color,
+        image_placeholder=post.image_placeholder,
+    )
+
+
+def _replace(posts, entries):
+    """Заменяет строки ленты выборки `posts` строками из базы."""
+    with use_primary():
+        fresh = [
+            entry_for(post)
+            for post in posts.select_related('author', 'group')
+            .defer('text').iterator(chunk_size=SYNC_CHUNK)
+        ]
+    with transaction.atomic():
+        entries.delete()
+        FeedEntry.objects.bulk_create(fresh, batch_size=SYNC_CHUNK)
+
+
+def sync_posts(post_ids):
+    post_ids = list(post_ids)
+    if post_ids:
+        _replace(
+            Post.objects.filter(pk__in=post_ids),
+            FeedEntry.objects.filter(post_id__in=post_ids)
+        )
+
+
+def sync_authors(author_ids):
+    """Пересобирает ленту авторов: bulk_create в SQLite не даёт id."""
+    author_ids = list(author_ids)
+    if author_ids:
+        _replace(
+            Post.objects.filter(author_id__in=author_ids),
+            FeedEntry.objects.filter(author_id__in=author_ids)
+        )
+
+
+def rename_author(user):
+    FeedEntry.objects.filter(author_id=user.pk).update(
+        author_username=user.username,
+        author_first_name=user.first_name,
+        author_last_name=user.last_name,
+    )
+
+
+def rename_group(group):
+    FeedEntry.objects.filter(group_id=group.pk).update(
+        group_slug=group.slug, group_title=group.title)
+
+
+def rebuild():
+    _replace(Post.objects.all(), FeedEntry.objects.all())
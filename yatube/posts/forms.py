@@ -1,5 +1,6 @@
 from django import forms
 from posts.models import Post, Comment
+from posts.uploadhandlers import RejectedUpload
 
 
 class PostForm(forms.ModelForm):
@@ -7,6 +8,23 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Файлы, отклонённые ImageUploadHandler, до поля не доходят.
+        self.files = self.files.copy()
+        self.rejected = {
+            name: upload for name, upload in list(self.files.items())
+            if isinstance(upload, RejectedUpload)
+        }
+        for name in self.rejected:
+            del self.files[name]
+
+    def clean_image(self):
+        if 'image' in self.rejected:
+            raise forms.ValidationError(
+                self.rejected['image'].error, code='invalid_image')
+        return self.cleaned_data['image']
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,24 @@
+from django.template.loader import render_to_string
+
+from core.fragments import register
+
+from . import resolvers
+from .models import Follow
+
+
+@register('switcher')
+def switcher(request, active=''):
+    return render_to_string(
+        'posts/includes/switcher.html', {'active': active}, request=request)
+
+
+@register('follow_button')
+def follow_button(request, author):
+    author = resolvers.users.by_username(author)
+    following = (
+        request.user.is_authenticated
+        and author.id in Follow.objects.authors_followed_by(request.user.id)
+    )
+    context = {'author': author, 'following': following}
+    return render_to_string(
+        'posts/includes/follow_button.html', context, request=request)
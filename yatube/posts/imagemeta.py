@@ -0,0 +1,44 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+# Сторона заглушки: размытая картинка такого размера весит меньше 1 КБ.
+PLACEHOLDER_SIZE: int = 16
+
+EMPTY_META = {
+    'image_width': None,
+    'image_height': None,
+    'image_size': None,
+    'image_format': '',
+    'image_color': '',
+    'image_placeholder': '',
+}
+
+
+def extract(image):
+    """Размеры, формат, средний цвет и заглушка (LQIP) картинки поста.
+
+    Возвращает значения полей Post.image_* или None, если файла нет.
+    """
+    if not image or not image.storage.exists(image.name):
+        return None
+    with image.storage.open(image.name) as file, Image.open(file) as source:
+        width, height = source.size
+        image_format = source.format or ''
+        # JPEG декодируется сразу в уменьшенном виде.
+        source.draft('RGB', (PLACEHOLDER_SIZE * 2, PLACEHOLDER_SIZE * 2))
+        small = source.convert('RGB')
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    color = small.resize((1, 1), Image.BOX).getpixel((0, 0))
+    buffer = BytesIO()
+    small.save(buffer, 'JPEG', quality=40)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': image.storage.size(image.name),
+        'image_format': image_format,
+        'image_color': '#{:02x}{:02x}{:02x}'.format(*color),
+        'image_placeholder': 'data:image/jpeg;base64,{}'.format(
+            base64.b64encode(buffer.getvalue()).decode()),
+    }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import imagemeta
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры, цвет и заглушки картинок старых постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать и уже заполненные посты')
+        parser.add_argument(
+            '--chunk', type=int, default=200,
+            help='Сколько постов читать за раз')
+
+    def handle(self, *args, all, chunk, **options):
+        posts = Post.objects.exclude(image='').only('id', 'image')
+        if not all:
+            posts = posts.filter(image_width__isnull=True)
+        done = missing = 0
+        for post in posts.iterator(chunk_size=chunk):
+            meta = imagemeta.extract(post.image)
+            if meta is None:
+                missing += 1
+                continue
+            Post.objects.filter(pk=post.pk).update(**meta)
+            done += 1
+            if done % chunk == 0:
+                self.stdout.write(f'Обработано: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {done}, файлов не найдено: {missing}'))
@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import FeedEntry, Group, Post
+from posts.rows import build_rows, feed_values
+
+User = get_user_model()
+
+
+def _models(per_page):
+    return list(Post.objects.select_related('author', 'group')[:per_page])
+
+
+def _rows(per_page):
+    return build_rows(feed_values(FeedEntry.objects.all())[:per_page])
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает страницу ленты из моделей Post и из FeedRow: '
+            'время и память на страницу')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=300)
+        parser.add_argument(
+            '--text-size', type=int, default=20000,
+            help='Длина текста постов, создаваемых для замера')
+
+    def handle(self, *args, per_page, repeat, text_size, **options):
+        # Тестовые посты создаются в транзакции и откатываются.
+        with transaction.atomic():
+            self.seed(per_page, text_size)
+            for name, build in (('Post', _models), ('FeedRow', _rows)):
+                self.measure(name, build, per_page, repeat)
+            transaction.set_rollback(True)
+
+    def seed(self, per_page, text_size):
+        author = User.objects.create_user(username='bench_feed_author')
+        group = Group.objects.create(
+            title='bench_feed_group', slug='bench_feed_group')
+        Post.objects.bulk_create(
+            Post(text='x' * text_size, author=author, group=group)
+            for _ in range(per_page)
+        )
+
+    def measure(self, name, build, per_page, repeat):
+        build(per_page)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            build(per_page)
+        elapsed = (time.perf_counter() - started) / repeat
+        tracemalloc.start()
+        build(per_page)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{name:8} {elapsed * 1000:8.3f} мс/страница '
+            f'{peak / 1024:10.1f} КБ пик памяти')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает начало текста (excerpt) постов для лент'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk', type=int, default=500,
+            help='Сколько постов читать за раз')
+
+    def handle(self, *args, chunk, **options):
+        posts = Post.objects.only('id', 'text', 'excerpt').order_by('pk')
+        updated = last_pk = 0
+        while True:
+            # Пачками по pk: в памяти не больше chunk текстов постов.
+            batch = list(posts.filter(pk__gt=last_pk)[:chunk])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            changed = []
+            for post in batch:
+                excerpt = make_excerpt(post.text)
+                if post.excerpt != excerpt:
+                    post.excerpt = excerpt
+                    changed.append(post)
+            Post.objects.bulk_update(changed, ['excerpt'])
+            updated += len(changed)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено постов: {updated}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import rebuild
+from posts.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает денормализованную таблицу ленты FeedEntry'
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Строк ленты: {FeedEntry.objects.count()}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.directory import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает число постов и превью для всех групп'
+
+    def handle(self, *args, **options):
+        rebuild_group_stats()
+        self.stdout.write(self.style.SUCCESS('Агрегаты групп обновлены'))
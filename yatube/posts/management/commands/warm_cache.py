@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = ('Прогревает кэши: первые страницы ленты, популярные группы, '
+            'профили и посты')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARMUP_PAGES,
+            help='Сколько первых страниц главной ленты')
+        parser.add_argument(
+            '--groups', type=int, default=settings.WARMUP_GROUPS,
+            help='Сколько популярных групп')
+        parser.add_argument(
+            '--profiles', type=int, default=settings.WARMUP_PROFILES,
+            help='Сколько популярных профилей')
+        parser.add_argument(
+            '--posts', type=int, default=settings.WARMUP_POSTS,
+            help='Сколько популярных постов')
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.WARMUP_CONCURRENCY,
+            help='Сколько страниц рендерить одновременно')
+
+    def handle(self, *args, pages, groups, profiles, posts, concurrency,
+               **options):
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(self.style.WARNING(
+                'LocMemCache у каждого процесса свой: команда прогреет '
+                'только себя, воркеры прогреваются при WARMUP_ON_BOOT'))
+        urls = warmup.targets(pages, groups, profiles, posts)
+        results = warmup.warm(urls, concurrency, self.progress)
+        failed = sum(status is None for _, status, _ in results)
+        seconds = sum(seconds for _, _, seconds in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {len(results) - failed}, ошибок: {failed}, '
+            f'суммарно {seconds:.1f} с'))
+
+    def progress(self, done, total, url, status, seconds):
+        status = 'ошибка' if status is None else status
+        self.stdout.write(
+            f'[{done}/{total}] {status} {seconds * 1000:.0f} мс {url}')
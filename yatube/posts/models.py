@@ -1,8 +1,27 @@
+import json
+
 from django.db import models
+from django.dispatch import Signal
+from django.utils.dateparse import parse_datetime
+from django.utils.text import Truncator
 from django.contrib.auth import get_user_model
 
+from core.storage import ContentAddressedStorage
+
+from .querycache import CachedQuerySet
+
 User = get_user_model()
 
+post_bulk_changed = Signal(
+    providing_args=['group_ids', 'author_ids', 'post_ids'])
+
+# Столько символов текста показывает карточка в ленте.
+EXCERPT_LENGTH: int = 300
+
+
+def make_excerpt(text):
+    return Truncator(text).chars(EXCERPT_LENGTH)
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -14,20 +33,91 @@ class Group(models.Model):
         unique=True
     )
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False
+    )
+    last_post_date = models.DateTimeField(
+        'Последний пост',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    preview = models.TextField(
+        'Новые посты',
+        blank=True,
+        editable=False,
+        help_text='JSON с последними постами группы'
+    )
+
+    objects = CachedQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    @property
+    def preview_posts(self):
+        posts = json.loads(self.preview or '[]')
+        for post in posts:
+            post['pub_date'] = parse_datetime(post['pub_date'])
+        return posts
+
     class Meta:
         verbose_name = 'Группа'
         verbose_name_plural = 'Группы'
 
 
+class PostQuerySet(CachedQuerySet):
+    """Массовые операции тоже обновляют агрегаты и кэши постов."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.excerpt = make_excerpt(obj.text)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        post_bulk_changed.send(
+            sender=self.model,
+            group_ids={obj.group_id for obj in objs},
+            author_ids={obj.author_id for obj in objs},
+            post_ids=[obj.pk for obj in objs if obj.pk]
+        )
+        return objs
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get('text'), str):
+            kwargs['excerpt'] = make_excerpt(kwargs['text'])
+        post_ids, group_ids, author_ids = set(), set(), set()
+        for post_id, group_id, author_id in self.values_list(
+                'id', 'group_id', 'author_id'):
+            post_ids.add(post_id)
+            group_ids.add(group_id)
+            author_ids.add(author_id)
+        count = super().update(**kwargs)
+        for field, ids in (('group', group_ids), ('author', author_ids)):
+            for name in (field, f'{field}_id'):
+                if post_ids and name in kwargs:
+                    ids.add(getattr(kwargs[name], 'pk', kwargs[name]))
+        post_bulk_changed.send(
+            sender=self.model,
+            group_ids=group_ids,
+            author_ids=author_ids,
+            post_ids=post_ids
+        )
+        return count
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста'
     )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True
@@ -50,14 +140,40 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # Заполняются фоновой задачей posts.tasks.store_image_meta.
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False)
+    image_size = models.PositiveIntegerField(
+        'Размер картинки', null=True, blank=True, editable=False)
+    image_format = models.CharField(
+        'Формат картинки', max_length=10, blank=True, editable=False)
+    image_color = models.CharField(
+        'Средний цвет картинки', max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(
+        'Заглушка картинки', blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    cache_scopes = ('group_id', 'author_id')
+
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [models.Index(fields=['group', '-pub_date'])]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -77,6 +193,10 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    objects = CachedQuerySet.as_manager()
+
+    cache_scopes = ('post_id', 'author_id')
+
     def __str__(self):
         return self.text
 
@@ -85,6 +205,13 @@ class Comment(models.Model):
         verbose_name_plural = 'Комментарии'
 
 
+class FollowQuerySet(CachedQuerySet):
+    def authors_followed_by(self, user_id):
+        """id авторов, на которых подписан пользователь, из кэша."""
+        return self.values_list('author_id', flat=True).cached(
+            scope={'user_id': user_id})
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -95,6 +222,10 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following')
 
+    objects = FollowQuerySet.as_manager()
+
+    cache_scopes = ('user_id', 'author_id')
+
     def __str__(self):
         return self.user.username
 
@@ -104,3 +235,89 @@ class Follow(models.Model):
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'],
             name='unique_following')]
+
+
+class Trend(models.Model):
+    """Затухающий рейтинг активности поста или группы.
+
+    В `score` хранится log2 от суммы весов событий, умноженных на
+    2 ** (время события / период полураспада). Порядок по такому
+    значению совпадает с порядком по текущему затухшему рейтингу,
+    поэтому старые записи не нужно пересчитывать.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trend',
+        blank=True,
+        null=True
+    )
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='trend',
+        blank=True,
+        null=True
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.post or self.group)
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Рейтинг'
+        verbose_name_plural = 'Рейтинги'
+
+
+class FeedEntry(models.Model):
+    """Денормализованная строка ленты: пост с автором и группой.
+
+    Ленты читают только эту таблицу, по индексам ниже, без JOIN.
+    Поддерживается сигналами (posts.feed), пересобирается командой
+    rebuild_feed.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    author_username = models.CharField(max_length=150)
+    author_first_name = models.CharField(max_length=150, blank=True)
+    author_last_name = models.CharField(max_length=150, blank=True)
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        db_index=False,
+        blank=True,
+        null=True
+    )
+    group_slug = models.CharField(max_length=100, blank=True)
+    group_title = models.CharField(max_length=200, blank=True)
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True)
+    image = models.CharField(max_length=100, blank=True)
+    image_color = models.CharField(max_length=7, blank=True)
+    image_placeholder = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.excerpt[:15]
+
+    class Meta:
+        ordering = ['-pub_date', '-post_id']
+        indexes = [
+            models.Index(fields=['-pub_date', '-post']),
+            models.Index(fields=['group', '-pub_date', '-post']),
+            models.Index(fields=['author', '-pub_date', '-post']),
+        ]
+        verbose_name = 'Строка ленты'
+        verbose_name_plural = 'Строки ленты'
@@ -0,0 +1,158 @@
+from collections.abc import Sequence
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .rows import build_rows
+
+
+class KeysetPage:
+    """Страница выборки по ключу: без OFFSET и без COUNT."""
+
+    def __init__(self, object_list, has_next, cursor):
+        self.object_list = object_list
+        self.cursor = cursor
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+
+class KeysetPaginator:
+    """Листает выборку по уникальному полю `key` после курсора."""
+
+    def __init__(self, object_list, per_page, key):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.key = key
+
+    def page(self, after=None):
+        object_list = self.object_list.order_by(self.key)
+        if after:
+            object_list = object_list.filter(**{f'{self.key}__gt': after})
+        items = object_list[:self.per_page + 1]
+        items = items.cached() if hasattr(items, 'cached') else list(items)
+        has_next = len(items) > self.per_page
+        items = items[:self.per_page]
+        cursor = getattr(items[-1], self.key) if items else None
+        return KeysetPage(items, has_next, cursor)
+
+
+class FeedPaginator(Paginator):
+    """Paginator ленты с известным заранее числом постов.
+
+    COUNT не выполняется, а переход на следующую страницу по курсору
+    `after` (дата и id последнего поста) ищет по индексу вместо OFFSET.
+    Выборка должна быть отсортирована по ('-pub_date', '-pk').
+    """
+
+    def __init__(self, object_list, per_page, count, after=None):
+        super().__init__(object_list, per_page)
+        self.__dict__['count'] = count
+        self.after = after
+
+    def page(self, number):
+        number = self.validate_number(number)
+        seek = parse_cursor(self.after)
+        if seek is None or seek[0] != number - 1:
+            return super().page(number)
+        _, pub_date, pk = seek
+        object_list = self.object_list.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )[:self.per_page]
+        page = self._get_page(object_list, number, self)
+        page.seek = f'{pub_date.isoformat()}~{pk}'
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+class LoadedPaginator(Paginator):
+    """Paginator, страницы которого отдаёт load(номер) - например, из кэша.
+
+    Число объектов известно заранее, своей выборки нет.
+    """
+
+    def __init__(self, load, per_page, count):
+        super().__init__([], per_page)
+        self.__dict__['count'] = count
+        self.load = load
+
+    def page(self, number):
+        number = self.validate_number(number)
+        return self._get_page(self.load(number), number, self)
+
+
+class FeedPage(Page):
+    # Курсор, по которому выбрана страница: разные курсоры дают разные
+    # страницы с одним номером, в ключах кэша нужны оба.
+    seek = ''
+
+    @property
+    def cursor(self):
+        """Курсор для ссылки на следующую страницу."""
+        if not len(self):
+            return ''
+        last = self[-1]
+        return f'{self.number}~{last.pub_date.isoformat()}~{last.id}'
+
+
+class LazyRows(Sequence):
+    """FeedRow страницы, выбираемые при первом обращении.
+
+    Если страницу целиком отдал кэш фрагментов, строки не нужны: без
+    обращения к ним не выполняется и SELECT страницы.
+    """
+
+    def __init__(self, values):
+        self._values = values
+        self._rows = None
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = build_rows(self._values)
+        return self._rows
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class RowsMixin:
+    """Страница из FeedRow: выборка должна быть из feed_values."""
+
+    def _get_page(self, object_list, *args, **kwargs):
+        return super()._get_page(LazyRows(object_list), *args, **kwargs)
+
+
+class RowPaginator(RowsMixin, Paginator):
+    pass
+
+
+class FeedRowPaginator(RowsMixin, FeedPaginator):
+    pass
+
+
+def parse_cursor(cursor):
+    try:
+        number, pub_date, pk = cursor.split('~')
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None:
+            return None
+        return int(number), pub_date, int(pk)
+    except (AttributeError, TypeError, ValueError):
+        return None
@@ -0,0 +1,154 @@
+"""Кэш результатов выборок с версиями таблиц и областей.
+
+Ключ результата включает текст SQL и версии всех таблиц запроса.
+Запись в таблицу меняет её версию, и старые результаты просто
+перестают находиться. Выборка с областью (`scope`) вместо версии
+своей таблицы зависит от версий области: например, лента группы
+сбрасывается только постами этой группы.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import models, transaction
+from django.db.models.sql import Query
+
+from core import invalidation
+
+from . import caching
+
+QUERY_CACHE_TIMEOUT: int = 60 * 15
+
+
+def table_key(table):
+    return f'qc:t:{table}'
+
+
+def scope_key(table, field, value):
+    return f'qc:s:{table}:{field}:{value}'
+
+
+def _tables(query):
+    """Таблицы запроса, включая JOIN и подзапросы в условиях."""
+    tables = {query.model._meta.db_table}
+    tables.update(join.table_name for join in query.alias_map.values())
+    nodes = [query.where]
+    while nodes:
+        node = nodes.pop()
+        for child in getattr(node, 'children', ()):
+            nodes.append(child)
+            rhs = getattr(child, 'rhs', None)
+            rhs = getattr(rhs, 'query', rhs)
+            if isinstance(rhs, Query):
+                tables |= _tables(rhs)
+    return tables
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump(keys):
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    def bump():
+        cache.set_many({key: time.time_ns() for key in keys}, None)
+    bump()
+    # Повторно после коммита: результат, прочитанный другим запросом
+    # до коммита, остался под промежуточной версией.
+    transaction.on_commit(bump)
+    invalidation.cache_changed(keys)
+
+
+def scope_values(instance):
+    return {
+        field: instance.__dict__.get(field)
+        for field in getattr(type(instance), 'cache_scopes', ())
+    }
+
+
+def changed(model, scopes=()):
+    """Меняет версию таблицы модели и перечисленных областей.
+
+    `scopes` - пары (поле, значение).
+    """
+    table = model._meta.db_table
+    _bump([table_key(table)] + [
+        scope_key(table, field, value) for field, value in scopes])
+
+
+def instance_changed(instance, initial=None):
+    """Запись или удаление объекта: старые и новые значения областей."""
+    scopes = set(scope_values(instance).items())
+    scopes.update((initial or {}).items())
+    changed(type(instance), scopes)
+
+
+class CachedQuerySet(models.QuerySet):
+    """QuerySet с методом cached() и сбросом версий при массовых записях."""
+
+    def cached(self, scope=None, timeout=QUERY_CACHE_TIMEOUT):
+        """Результат выборки списком, по возможности из кэша.
+
+        `scope` - словарь {поле: значение} из cache_scopes модели;
+        выборка ограничивается им, а ключ зависит от версий области
+        вместо версии всей таблицы.
+        """
+        queryset = self.filter(**scope) if scope else self
+        query = queryset.query.clone()
+        try:
+            sql, params = query.get_compiler(queryset.db).as_sql()
+        except EmptyResultSet:
+            return []
+        table = queryset.model._meta.db_table
+        version_keys = [
+            table_key(name) for name in sorted(_tables(query))
+            if not (scope and name == table)
+        ]
+        version_keys += [
+            scope_key(table, field, value)
+            for field, value in sorted((scope or {}).items())
+        ]
+        digest = hashlib.md5(repr((
+            queryset.db, sql, params, _versions(version_keys)
+        )).encode()).hexdigest()
+        key = f'qc:{digest}'
+        return caching.get_or_compute(key, lambda: list(queryset), timeout)
+
+    def _scopes(self):
+        fields = getattr(self.model, 'cache_scopes', ())
+        if not fields:
+            return set()
+        return {
+            (field, value)
+            for row in self.values_list(*fields)
+            for field, value in zip(fields, row)
+        }
+
+    def update(self, **kwargs):
+        scopes = self._scopes()
+        count = super().update(**kwargs)
+        scopes |= {
+            (field, getattr(kwargs[name], 'pk', kwargs[name]))
+            for field in getattr(self.model, 'cache_scopes', ())
+            for name in (field, field[:-len('_id')])
+            if name in kwargs
+        }
+        changed(self.model, scopes)
+        return count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        scopes = set()
+        for obj in objs:
+            scopes.update(scope_values(obj).items())
+        changed(self.model, scopes)
+        return objs
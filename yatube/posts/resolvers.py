@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from threading import Lock
+
+from django.db import router
+from django.http import Http404
+
+from core import invalidation
+from core.routers import use_primary
+
+from . import bloom
+from .models import Group, User
+
+
+class LRUCache:
+    """Потокобезопасный словарь, вытесняющий давно не нужные ключи."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, match):
+        """Удаляет все значения, для которых `match(value)` истинно."""
+        with self._lock:
+            for key in [k for k, v in self._data.items() if match(v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _may_exist(keys, key):
+    return keys.might_exist(key) and not keys.is_missing(key)
+
+
+class BroadcastCache:
+    """Кэш процесса, сбросы которого получают и другие процессы.
+
+    Подклассы держат LRUCache в self.cache и реализуют discard().
+    """
+
+    def __init__(self, channel=None):
+        self.channel = channel
+        if channel is not None:
+            invalidation.subscribe(channel, self.receive)
+
+    def invalidate(self, *args):
+        self.discard(*args)
+        if self.channel is not None:
+            invalidation.publish(self.channel, list(args))
+
+    def receive(self, payload):
+        if payload is None:
+            self.cache.clear()
+        else:
+            self.discard(*payload)
+
+
+class Resolver(BroadcastCache):
+    """Кэш «ключ из URL -> объект» поверх LRUCache."""
+
+    def __init__(self, model, field, maxsize=1024, keys=None, channel=None):
+        super().__init__(channel)
+        self.model = model
+        self.field = field
+        self.cache = LRUCache(maxsize)
+        self.keys = keys
+
+    def get_or_404(self, key):
+        obj = self.cache.get(key)
+        if obj is None:
+            message = f'{self.model._meta.object_name} {key} не найден'
+            if self.keys is not None and not _may_exist(self.keys, key):
+                raise Http404(message)
+            try:
+                with use_primary():
+                    obj = self.model.objects.get(**{self.field: key})
+            except self.model.DoesNotExist:
+                if self.keys is not None:
+                    self.keys.missing(key)
+                raise Http404(message)
+            self.cache.set(key, obj)
+        return obj
+
+    def discard(self, pk, key=None):
+        """Сбрасывает объект по pk и по ключу: ключ мог достаться
+        новому объекту, а pk - старому."""
+        self.cache.discard(
+            lambda obj: obj.pk == pk or getattr(obj, self.field) == key)
+
+
+class UserRecord:
+    """Лёгкая запись о пользователе: только то, что нужно страницам."""
+
+    __slots__ = ('id', 'username', 'first_name', 'last_name')
+    fields = __slots__
+
+    def __init__(self, id, username, first_name, last_name):
+        self.id = id
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def as_user(self):
+        """Экземпляр User без запроса; остальные поля отложены."""
+        values = [getattr(self, field) for field in self.fields]
+        return User.from_db(router.db_for_read(User), self.fields, values)
+
+    def __str__(self):
+        return self.username
+
+
+class UserIdentityCache(BroadcastCache):
+    """Кэш пользователей по username и по id с общим лимитом."""
+
+    def __init__(self, maxsize=4096, channel=None):
+        super().__init__(channel)
+        self.cache = LRUCache(maxsize * 2)
+
+    def _load(self, **lookup):
+        with use_primary():
+            values = (
+                User.objects.filter(**lookup)
+                .values_list(*UserRecord.fields).first()
+            )
+        if values is None:
+            raise Http404('Пользователь не найден')
+        record = UserRecord(*values)
+        self.cache.set(('username', record.username), record)
+        self.cache.set(('id', record.id), record)
+        return record
+
+    def by_username(self, username):
+        record = self.cache.get(('username', username))
+        if record is not None:
+            return record
+        if not _may_exist(bloom.usernames, username):
+            raise Http404('Пользователь не найден')
+        try:
+            return self._load(username=username)
+        except Http404:
+            bloom.usernames.missing(username)
+            raise
+
+    def by_id(self, pk):
+        record = self.cache.get(('id', pk))
+        return record or self._load(id=pk)
+
+    def discard(self, pk, username=None):
+        self.cache.discard(
+            lambda record: record.id == pk or record.username == username)
+
+
+groups = Resolver(
+    Group, 'slug', keys=bloom.group_slugs, channel='resolvers.groups')
+users = UserIdentityCache(channel='resolvers.users')
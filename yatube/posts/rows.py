@@ -0,0 +1,122 @@
+from django.db import router
+from django.db.models.fields.files import ImageFieldFile
+
+from .models import Group, Post, User
+
+ROW_FIELDS = (
+    'post_id',
+    'excerpt',
+    'pub_date',
+    'image',
+    'image_color',
+    'image_placeholder',
+    'author_id',
+    'author_username',
+    'author_first_name',
+    'author_last_name',
+    'group_id',
+    'group_slug',
+    'group_title',
+)
+
+
+class FeedRow:
+    """Пост в ленте: только то, что нужно карточке.
+
+    `text` - сохранённое начало текста (Post.excerpt), полный текст
+    читает только post_detail. Автор и группа - экземпляры моделей
+    с отложенными полями, общие для всех постов страницы.
+    """
+    __slots__ = (
+        'id',
+        'text',
+        'pub_date',
+        'image',
+        'image_color',
+        'image_placeholder',
+        'author_id',
+        'group_id',
+        'author',
+        'group',
+        'thumbnail',
+    )
+
+    def __init__(self, values, image_field, author, group):
+        self.id = values['post_id']
+        self.text = values['excerpt']
+        self.pub_date = values['pub_date']
+        self.image = ImageFieldFile(None, image_field, values['image'])
+        self.image_color = values['image_color']
+        self.image_placeholder = values['image_placeholder']
+        self.author_id = values['author_id']
+        self.group_id = values['group_id']
+        self.author = author
+        self.group = group
+        self.thumbnail = None
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, (FeedRow, Post)):
+            return self.id == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class _Related:
+    """Экземпляры связанной модели из колонок строки, по одному на id."""
+
+    def __init__(self, model, columns):
+        self.model = model
+        # from_db ждёт значения в порядке полей модели.
+        self.field_names = [
+            field.attname for field in model._meta.concrete_fields
+            if field.attname in columns
+        ]
+        self.columns = [columns[name] for name in self.field_names]
+        self.id_column = columns['id']
+        self.db = router.db_for_read(model)
+        self.instances = {}
+
+    def get(self, values):
+        pk = values[self.id_column]
+        if pk is None:
+            return None
+        instance = self.instances.get(pk)
+        if instance is None:
+            instance = self.model.from_db(
+                self.db,
+                self.field_names,
+                [values[column] for column in self.columns]
+            )
+            self.instances[pk] = instance
+        return instance
+
+
+def feed_values(entries):
+    """Строки ленты (FeedEntry) в виде словарей - одна таблица."""
+    return entries.values(*ROW_FIELDS)
+
+
+def build_rows(values):
+    """FeedRow из словарей feed_values."""
+    image_field = Post._meta.get_field('image')
+    authors = _Related(User, {
+        'id': 'author_id',
+        'username': 'author_username',
+        'first_name': 'author_first_name',
+        'last_name': 'author_last_name',
+    })
+    groups = _Related(Group, {
+        'id': 'group_id',
+        'slug': 'group_slug',
+        'title': 'group_title',
+    })
+    return [
+        FeedRow(row, image_field, authors.get(row), groups.get(row))
+        for row in values
+    ]
@@ -0,0 +1,154 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save,
+)
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from . import (
+    bloom, bundles, cards, directory, feed, querycache, resolvers, tasks,
+)
+from .models import Comment, Follow, Group, Post, User, post_bulk_changed
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Через __dict__, чтобы не подгружать отложенное поле.
+    instance._initial_group_id = instance.__dict__.get('group_id')
+    instance._initial_image = _image_name(instance.__dict__.get('image'))
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Comment)
+@receiver(post_init, sender=Follow)
+def remember_scopes(sender, instance, **kwargs):
+    instance._initial_scopes = querycache.scope_values(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_queries(sender, instance, **kwargs):
+    querycache.instance_changed(
+        instance, getattr(instance, '_initial_scopes', None))
+    instance._initial_scopes = querycache.scope_values(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+def key_saved(sender, instance, update_fields=None, **kwargs):
+    keys = bloom.KEY_SETS[sender]
+    if update_fields is None or keys.field in update_fields:
+        keys.added(getattr(instance, keys.field))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def key_deleted(sender, instance, **kwargs):
+    keys = bloom.KEY_SETS[sender]
+    keys.removed(getattr(instance, keys.field))
+
+
+def _image_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+def refresh_group_stats(group_ids):
+    group_ids = sorted(group_id for group_id in group_ids if group_id)
+    if group_ids:
+        # Число постов - сразу: на нём держится лента группы.
+        directory.refresh_group_counts(group_ids)
+        enqueue(tasks.refresh_group_stats, group_ids)
+
+
+@receiver(pre_save, sender=Post)
+def remember_upload(sender, instance, **kwargs):
+    # Загружаемый файл сохраняется в хранилище вместе с моделью.
+    instance._uploading_image = (
+        bool(instance.image) and not instance.image._committed)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    refresh_group_stats({instance._initial_group_id, instance.group_id})
+    instance._initial_group_id = instance.group_id
+    image = _image_name(instance.image)
+    if instance._initial_image != image:
+        if instance._initial_image:
+            enqueue(tasks.release_image, instance._initial_image)
+        enqueue(tasks.store_image_meta, instance.pk)
+        if image:
+            enqueue(tasks.warm_thumbnails, instance.pk)
+        instance._initial_image = image
+    elif image and getattr(instance, '_uploading_image', False):
+        # Та же картинка загружена повторно: хранилище вернуло прежнее
+        # имя, но добавило ссылку, которую некому снять.
+        enqueue(tasks.release_image, image)
+    feed.sync_posts([instance.pk])
+    bundles.invalidate_posts([instance.pk])
+    cards.bump('post', instance.pk)
+    if created:
+        bundles.invalidate_author(instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    refresh_group_stats({instance.group_id})
+    if instance.image:
+        enqueue(tasks.release_image, instance.image.name)
+    bundles.invalidate_posts([instance.pk])
+    bundles.invalidate_author(instance.author_id)
+
+
+@receiver(post_bulk_changed, sender=Post)
+def posts_bulk_changed(sender, group_ids, author_ids, post_ids, **kwargs):
+    refresh_group_stats(group_ids)
+    if post_ids:
+        feed.sync_posts(post_ids)
+    else:
+        feed.sync_authors(author_ids)
+    for post_id in post_ids:
+        bloom.post_ids.added(post_id)
+    if author_ids and not post_ids:
+        # bulk_create без id (SQLite): новых постов фильтр не знает.
+        bloom.post_ids.invalidate()
+    bundles.invalidate_posts(post_ids)
+    for author_id in author_ids:
+        bundles.invalidate_author(author_id)
+    for post_id in post_ids:
+        cards.bump('post', post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bundles.invalidate_posts([instance.post_id])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    resolvers.groups.invalidate(instance.pk, instance.slug)
+    feed.rename_group(instance)
+    cards.bump('group', instance.pk)
+    bundles.invalidate_posts(
+        Post.objects.filter(group_id=instance.pk).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    resolvers.users.invalidate(instance.pk, instance.username)
+    querycache.changed(User)
+    feed.rename_author(instance)
+    cards.bump('user', instance.pk)
+    bundles.invalidate_commenter(instance.pk)
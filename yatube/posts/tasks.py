@@ -0,0 +1,55 @@
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from core.tasks import task
+
+from . import directory, imagemeta, thumbnails, trending
+from .models import Post
+
+
+@task(batched=True, priority=10)
+def refresh_group_stats(calls):
+    """Пересчитывает счётчики всех групп из пачки одним проходом."""
+    directory.refresh_group_stats(
+        {group_id for group_ids, in calls for group_id in group_ids})
+
+
+@task(priority=5)
+def warm_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image or not post.image.storage.exists(
+            post.image.name):
+        return
+    get_thumbnail(
+        post.image, thumbnails.CARD_GEOMETRY, **thumbnails.CARD_OPTIONS)
+
+
+@task(priority=5)
+def store_image_meta(post_id):
+    """Сохраняет размеры, цвет и заглушку картинки в полях поста."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None:
+        return
+    meta = imagemeta.extract(post.image) or imagemeta.EMPTY_META
+    Post.objects.filter(pk=post_id, image=post.image.name).update(**meta)
+
+
+@task(priority=5)
+def release_image(name):
+    """Снимает ссылку на картинку и чистит осиротевшие миниатюры."""
+    storage = Post._meta.get_field('image').storage
+    if storage.release(name):
+        delete_thumbnails(ImageFile(name, storage), delete_file=False)
+
+
+@task()
+def bump_post(post_id):
+    post = Post.objects.filter(pk=post_id).only('id', 'group').first()
+    if post is not None:
+        trending.bump_post(post)
+
+
+@task()
+def bump_author(author_id):
+    trending.bump_author(author_id)
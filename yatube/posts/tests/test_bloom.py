@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import bloom, resolvers
+from posts.bloom import BloomFilter
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        """Добавленные ключи всегда находятся, чужие - почти никогда."""
+        bloom_filter = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom_filter.add(f'user_{i}')
+        self.assertTrue(all(f'user_{i}' in bloom_filter for i in range(1000)))
+        false_positives = sum(
+            f'other_{i}' in bloom_filter for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class NotFoundWithoutQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        resolvers.groups.cache.clear()
+        resolvers.users.cache.clear()
+        self.guest_client = Client()
+
+    def assert_404_without_queries(self, url):
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_keys(self):
+        """Несуществующие профиль, группа и пост - 404 без базы."""
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'nobody'}),
+            reverse('posts:group_posts', kwargs={'slug': 'no_such_group'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_404_without_queries(url)
+
+    def test_large_post_ids_rejected(self):
+        """Случайные большие id постов - 404 без запроса к базе."""
+        # Первая проверка читает общий максимум id из базы.
+        self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 555555555}))
+        for post_id in (987654321, 123456789):
+            url = reverse('posts:post_detail', kwargs={'post_id': post_id})
+            with self.subTest(post_id=post_id):
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_post_ids_above_filter_found(self):
+        """Посты, созданные после постройки фильтра, находятся."""
+        bloom.post_ids.might_exist(self.post.id)
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.user) for i in range(3)])
+        newest = Post.objects.latest('id')
+        self.assertTrue(bloom.post_ids.might_exist(newest.id))
+
+    def test_false_positive_cached_as_missing(self):
+        """Ключ, пропущенный фильтром, после одного запроса кэшируется."""
+        bloom.usernames.might_exist('nobody')
+        bloom.usernames._state[0].add('nobody')
+        url = reverse('posts:profile', kwargs={'username': 'nobody'})
+        self.assert_404_without_queries(url)
+
+    def test_new_keys_found(self):
+        """Созданные после постройки фильтра объекты находятся."""
+        for keys, key in (
+            (bloom.usernames, 'new_user'),
+            (bloom.group_slugs, 'new_slug'),
+        ):
+            self.assertFalse(keys.might_exist(key))
+        user = User.objects.create_user(username='new_user')
+        Group.objects.create(title='Новая', slug='new_slug')
+        post = Post.objects.create(text='Новый пост', author=user)
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'new_user'}),
+            reverse('posts:group_posts', kwargs={'slug': 'new_slug'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 200)
+
+    def test_other_process_additions_found(self):
+        """Ключ, добавленный другим процессом, виден после смены версии."""
+        self.assertFalse(bloom.group_slugs.might_exist('elsewhere'))
+        Group.objects.bulk_create(
+            [Group(title='Чужая', slug='elsewhere')])
+        bloom.group_slugs.invalidate()
+        self.assertTrue(bloom.group_slugs.might_exist('elsewhere'))
+
+    def test_created_key_clears_missing(self):
+        """Создание объекта сбрасывает запомненный промах."""
+        url = reverse('posts:group_posts', kwargs={'slug': 'late_slug'})
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+        bloom.group_slugs.missing('late_slug')
+        Group.objects.create(title='Поздняя', slug='late_slug')
+        self.assertEqual(self.guest_client.get(url).status_code, 200)
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.bundles import COMMENTS_PAGE
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostBundleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+
+    def test_warm_detail_without_queries(self):
+        """Тёплая страница поста не обращается к базе."""
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(response.context['post'].author, self.user)
+        self.assertEqual(response.context['number_of_posts'], 1)
+
+    def test_comment_invalidates_bundle(self):
+        """Новый комментарий виден сразу."""
+        self.guest_client.get(self.url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        response = self.guest_client.get(self.url)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий']
+        )
+
+    def test_comments_paginated(self):
+        """Комментарии сверх первой страницы доступны на следующих."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Комментарий {i}')
+            for i in range(COMMENTS_PAGE + 1)
+        )
+        response = self.guest_client.get(self.url)
+        self.assertEqual(len(response.context['comments']), COMMENTS_PAGE)
+        self.assertContains(response, '?page=2')
+        response = self.guest_client.get(self.url, {'page': 2})
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Комментарий {COMMENTS_PAGE}']
+        )
+        with self.assertNumQueries(0):
+            self.guest_client.get(self.url, {'page': 2})
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий')
+        response = self.guest_client.get(self.url, {'page': 2})
+        self.assertEqual(len(response.context['comments']), 2)
+
+    def test_commenter_rename_invalidates_bundle(self):
+        """Новое имя комментатора видно сразу."""
+        reader = User.objects.create_user(username='reader')
+        Comment.objects.create(post=self.post, author=reader, text='Текст')
+        self.guest_client.get(self.url)
+        reader.username = 'new_reader'
+        reader.save()
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'new_reader')
+
+    def test_edit_invalidates_bundle(self):
+        """Отредактированный пост виден сразу."""
+        self.guest_client.get(self.url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['post'].text, 'Новый текст')
+
+    def test_new_post_updates_author_counter(self):
+        """Новый пост автора меняет счётчик его постов."""
+        self.guest_client.get(self.url)
+        Post.objects.create(text='Ещё пост', author=self.user)
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['number_of_posts'], 2)
+
+    def test_missing_post_is_404(self):
+        """Несуществующий пост отвечает 404."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,102 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+
+from posts import caching
+
+
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_computes_once_while_fresh(self):
+        """Свежее значение берётся из кэша без пересчёта."""
+        self.assertEqual(caching.get_or_compute('k', self.compute, 60), 1)
+        self.assertEqual(caching.get_or_compute('k', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_other_recomputes(self):
+        """Пока другой поток держит блокировку, отдаётся старое."""
+        cache.set('k', ('старое', 0.1, time.time() - 1), 60)
+        cache.add(caching._lock_key('k'), True)
+        self.assertEqual(
+            caching.get_or_compute('k', self.compute, 60), 'старое')
+        self.assertEqual(self.calls, 0)
+
+    def test_lock_winner_recomputes_stale_value(self):
+        """Просроченное значение пересчитывает взявший блокировку."""
+        cache.set('k', ('старое', 0.1, time.time() - 1), 60)
+        self.assertEqual(caching.get_or_compute('k', self.compute, 60), 1)
+        self.assertIsNone(cache.get(caching._lock_key('k')))
+
+    def test_early_refresh_near_expiry(self):
+        """Долго считаемое значение обновляется до истечения срока."""
+        cache.set('k', ('старое', 10.0, time.time() + 1), 60)
+        with mock.patch('posts.caching.random.random', return_value=0.9):
+            self.assertEqual(
+                caching.get_or_compute('k', self.compute, 60), 1)
+
+    def test_lock_released_on_error(self):
+        """Ошибка вычисления не оставляет блокировку."""
+        def fail():
+            raise ValueError
+        with self.assertRaises(ValueError):
+            caching.get_or_compute('k', fail, 60)
+        self.assertIsNone(cache.get(caching._lock_key('k')))
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи потоков процесса считают значение раз."""
+        lock = Lock()
+
+        def slow():
+            time.sleep(0.2)
+            with lock:
+                return self.compute()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            values = list(pool.map(
+                lambda _: caching.get_or_compute('k', slow, 60), range(8)))
+        self.assertEqual(values, [1] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_cold_miss_waits_for_other_thread(self):
+        """Без старого значения ждём чужого вычисления, а не считаем."""
+        cache.add(caching._lock_key('k'), True)
+
+        def computed_elsewhere(seconds):
+            cache.set('k', ('чужое', 0.1, time.time() + 60), 60)
+
+        with mock.patch('posts.caching.time.sleep', computed_elsewhere):
+            self.assertEqual(
+                caching.get_or_compute('k', self.compute, 60), 'чужое')
+        self.assertEqual(self.calls, 0)
+
+
+class FragmentCacheTagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def render(self, value):
+        template = Template(
+            '{% load fragment_cache %}'
+            '{% fragment_cache 20 test_fragment key %}{{ value }}'
+            '{% endfragment_cache %}'
+        )
+        return template.render(Context({'key': 1, 'value': value}))
+
+    def test_fragment_cached(self):
+        """Фрагмент рендерится один раз и дальше берётся из кэша."""
+        self.assertEqual(self.render('первый'), 'первый')
+        self.assertEqual(self.render('второй'), 'первый')
+        cache.clear()
+        self.assertEqual(self.render('второй'), 'второй')
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.cards import render_cards
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test_user', first_name='Иван')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_card(self, **kwargs):
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk)
+        return render_cards([post], **kwargs)[0]
+
+    def test_card_is_cached(self):
+        """Повторная отрисовка берёт карточку из кэша."""
+        card = self.get_card()
+        self.assertIn('Тестовый текст поста', card)
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk)
+        post.text = 'Текст, которого нет в кэше'
+        self.assertEqual(render_cards([post])[0], card)
+
+    def test_post_edit_refreshes_card(self):
+        """Правка поста даёт новую карточку."""
+        self.get_card()
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.assertIn('Новый текст', self.get_card())
+
+    def test_author_and_group_changes_refresh_card(self):
+        """Смена имени автора или группы даёт новую карточку."""
+        self.get_card()
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        self.assertIn('Пётр', self.get_card())
+        self.group.slug = 'new_slug'
+        self.group.save()
+        self.assertIn('/group/new_slug/', self.get_card())
+
+    def test_profile_variant_hides_author(self):
+        """В профиле карточка без строки автора."""
+        self.assertIn('Автор:', self.get_card())
+        self.assertNotIn('Автор:', self.get_card(is_profile=True))
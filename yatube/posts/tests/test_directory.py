@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.tasks import run_pending
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='А группа',
+            slug='a_slug',
+            description='Тестовое описание группы'
+        )
+        cls.other_group = Group.objects.create(
+            title='Б группа',
+            slug='b_slug',
+            description='Тестовое описание группы'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    @override_settings(TASKS_EAGER=False)
+    def test_stats_refreshed_in_background(self):
+        """Без TASKS_EAGER число постов обновляется сразу, превью - в фоне."""
+        for text in ('Первый пост', 'Второй пост'):
+            Post.objects.create(text=text, author=self.user, group=self.group)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 2)
+        self.assertEqual(self.group.preview_posts, [])
+        run_pending()
+        self.group.refresh_from_db()
+        self.assertEqual(len(self.group.preview_posts), 2)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_new_post_in_group_feed_without_worker(self):
+        """Новый пост виден в ленте группы, не дожидаясь очереди."""
+        Post.objects.create(
+            text='Пост без обработчика', author=self.user, group=self.group)
+        response = self.guest_client.get(
+            reverse('posts:group_posts', args=[self.group.slug]))
+        self.assertContains(response, 'Пост без обработчика')
+
+    def test_stats_follow_post_writes(self):
+        """Агрегаты группы обновляются при создании и удалении поста."""
+        post = Post.objects.create(
+            text='Первый пост группы',
+            author=self.user,
+            group=self.group
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(self.group.last_post_date, post.pub_date)
+        self.assertEqual(
+            self.group.preview_posts[0]['text'], 'Первый пост группы')
+        post.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertIsNone(self.group.last_post_date)
+
+    def test_stats_follow_group_change(self):
+        """Перенос поста в другую группу пересчитывает обе группы."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+    def test_stats_follow_bulk_create(self):
+        """Массовое создание постов тоже обновляет агрегаты."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user, group=self.group)
+            for i in range(3)
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 3)
+
+    def test_directory_keyset_pages(self):
+        """Каталог групп листается по курсору."""
+        response = self.guest_client.get(reverse('posts:group_index'))
+        self.assertTemplateUsed(response, 'posts/group_index.html')
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.group, self.other_group]
+        )
+        response = self.guest_client.get(
+            reverse('posts:group_index'), {'after': self.group.title})
+        self.assertEqual(
+            list(response.context['page_obj']), [self.other_group])
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import FeedEntry, Group, Post
+
+User = get_user_model()
+
+
+class FeedEntryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test_user', first_name='Имя', last_name='Фамилия')
+
+    def setUp(self):
+        self.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        self.post = Post.objects.create(
+            text='Тестовый текст поста', author=self.user, group=self.group)
+
+    def entry(self):
+        return FeedEntry.objects.get(post_id=self.post.id)
+
+    def test_entry_follows_post(self):
+        """Строка ленты создаётся и меняется вместе с постом."""
+        entry = self.entry()
+        self.assertEqual(entry.excerpt, 'Тестовый текст поста')
+        self.assertEqual(entry.author_username, 'test_user')
+        self.assertEqual(entry.group_slug, 'test_slug')
+        self.post.text = 'Исправленный текст'
+        self.post.group = None
+        self.post.save()
+        entry = self.entry()
+        self.assertEqual(entry.excerpt, 'Исправленный текст')
+        self.assertIsNone(entry.group_id)
+        self.post.delete()
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_entry_follows_author_and_group(self):
+        """Переименование автора и группы попадает в строки ленты."""
+        self.user.first_name = 'Новое'
+        self.user.save()
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        entry = self.entry()
+        self.assertEqual(entry.author_first_name, 'Новое')
+        self.assertEqual(entry.group_title, 'Новый заголовок')
+        self.group.delete()
+        self.assertIsNone(self.entry().group_id)
+
+    def test_bulk_operations(self):
+        """Массовое создание и обновление постов тоже попадают в ленту."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.user)
+            for number in range(3)
+        )
+        self.assertEqual(FeedEntry.objects.count(), 4)
+        Post.objects.filter(author=self.user).update(text='Одинаковый')
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('excerpt', flat=True)),
+            {'Одинаковый'}
+        )
+
+    def test_rebuild_feed_command(self):
+        """rebuild_feed восстанавливает таблицу по постам."""
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertEqual(self.entry().excerpt, 'Тестовый текст поста')
@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def red_png():
+    buffer = BytesIO()
+    Image.new('RGB', (40, 20), (255, 0, 0)).save(buffer, 'PNG')
+    return SimpleUploadedFile('red.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageMetaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Тестовый текст поста', author=self.user, image=red_png())
+
+    def test_meta_stored_on_upload(self):
+        """После загрузки у поста есть размеры, цвет и заглушка."""
+        self.post.refresh_from_db()
+        self.assertEqual(
+            (self.post.image_width, self.post.image_height), (40, 20))
+        self.assertEqual(self.post.image_format, 'PNG')
+        self.assertEqual(self.post.image_size, self.post.image.size)
+        self.assertEqual(self.post.image_color, '#ff0000')
+        self.assertTrue(
+            self.post.image_placeholder.startswith('data:image/jpeg;base64,'))
+
+    def test_meta_cleared_with_image(self):
+        """Без картинки поля метаданных пустые."""
+        self.post.image = ''
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertIsNone(self.post.image_width)
+        self.assertEqual(self.post.image_placeholder, '')
+
+    def test_backfill_command(self):
+        """backfill_image_meta заполняет посты без метаданных."""
+        Post.objects.update(image_width=None, image_color='')
+        Post.objects.create(
+            text='Пост без файла', author=self.user, image='posts/lost.png')
+        out = StringIO()
+        call_command('backfill_image_meta', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_width, 40)
+        self.assertEqual(self.post.image_color, '#ff0000')
+        self.assertIn('файлов не найдено: 1', out.getvalue())
+
+    def test_feed_reserves_space(self):
+        """Карточка ленты задаёт размеры и заглушку и грузится лениво."""
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'background: #ff0000')
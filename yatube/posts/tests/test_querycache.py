@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.other = User.objects.create_user(username='other_user')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Тестовый текст поста', author=self.user, group=self.group)
+
+    def group_posts(self):
+        return Post.objects.cached(scope={'group_id': self.group.id})
+
+    def test_repeated_query_from_cache(self):
+        """Повторная выборка не обращается к базе."""
+        self.assertEqual(self.group_posts(), [self.post])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group_posts(), [self.post])
+
+    def test_write_in_scope_invalidates(self):
+        """Новый пост группы сбрасывает её выборки."""
+        self.group_posts()
+        post = Post.objects.create(
+            text='Ещё пост', author=self.user, group=self.group)
+        self.assertEqual(len(self.group_posts()), 2)
+        post.group = None
+        post.save()
+        self.assertEqual(self.group_posts(), [self.post])
+
+    def test_write_outside_scope_keeps_cache(self):
+        """Пост вне группы не сбрасывает выборку группы."""
+        self.group_posts()
+        Post.objects.create(text='Без группы', author=self.user)
+        with self.assertNumQueries(0):
+            self.group_posts()
+
+    def test_joined_tables_versioned(self):
+        """Правка таблицы из JOIN сбрасывает выборку."""
+        def with_authors():
+            return Post.objects.select_related('author').cached()
+        with_authors()
+        self.user.first_name = 'Имя'
+        self.user.save()
+        self.assertEqual(with_authors()[0].author.first_name, 'Имя')
+
+    def test_bulk_operations_invalidate(self):
+        """Массовые операции меняют версии."""
+        comments = Comment.objects.cached(scope={'post_id': self.post.id})
+        self.assertEqual(comments, [])
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='Комментарий')])
+        self.assertEqual(
+            len(Comment.objects.cached(scope={'post_id': self.post.id})), 1)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.assertEqual(self.group_posts()[0].text, 'Новый текст')
+
+    def test_followed_authors(self):
+        """Подписки читаются из кэша и сбрасываются при подписке."""
+        self.assertEqual(Follow.objects.authors_followed_by(self.user.id), [])
+        Follow.objects.create(user=self.user, author=self.other)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                Follow.objects.authors_followed_by(self.user.id),
+                [self.other.id]
+            )
+            Follow.objects.authors_followed_by(self.user.id)
+        Follow.objects.filter(user=self.user).delete()
+        self.assertEqual(Follow.objects.authors_followed_by(self.user.id), [])
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import resolvers
+from posts.models import Group, Post
+from posts.resolvers import LRUCache
+
+User = get_user_model()
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        """Переполненный кэш вытесняет самый старый ключ."""
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+
+class ResolverTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        for i in range(13):
+            Post.objects.create(
+                text=f'Тестовый текст поста {i}',
+                author=cls.user,
+                group=cls.group
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        resolvers.groups.cache.clear()
+        resolvers.users.cache.clear()
+
+    def test_group_is_cached_and_invalidated(self):
+        """Группа берётся из кэша до её изменения."""
+        resolvers.groups.get_or_404(self.group.slug)
+        with self.assertNumQueries(0):
+            resolvers.groups.get_or_404(self.group.slug)
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        self.assertEqual(
+            resolvers.groups.get_or_404(self.group.slug).title,
+            'Новый заголовок'
+        )
+
+    def test_missing_slug_raises_404(self):
+        """Несуществующий slug даёт 404."""
+        with self.assertRaises(Http404):
+            resolvers.groups.get_or_404('no_such_slug')
+
+    def test_group_feed_single_query(self):
+        """Лента группы при тёплом кэше групп - один запрос."""
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        self.guest_client.get(url)
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_group_feed_follows_cursor(self):
+        """Переход по курсору даёт ту же страницу, что и OFFSET."""
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        first = self.guest_client.get(url).context['page_obj']
+        by_offset = self.guest_client.get(url, {'page': 2})
+        by_cursor = self.guest_client.get(
+            url, {'page': 2, 'after': first.cursor})
+        self.assertEqual(
+            list(by_offset.context['page_obj']),
+            list(by_cursor.context['page_obj'])
+        )
+        self.assertEqual(len(by_cursor.context['page_obj']), 3)
+
+    def test_cursor_page_not_cached_as_plain_page(self):
+        """Страница по чужому курсору не подменяет обычную в кэше."""
+        cache.clear()
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        forged = self.guest_client.get(
+            url, {'page': 2, 'after': '1~2000-01-01T00:00:00+00:00~1'})
+        self.assertNotContains(forged, 'Тестовый текст поста 0')
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertContains(response, 'Тестовый текст поста 0')
+
+
+class UserIdentityCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test_user', first_name='Иван', last_name='Петров')
+
+    def setUp(self):
+        resolvers.users.cache.clear()
+
+    def test_record_is_shared_by_username_and_id(self):
+        """Запись доступна и по username, и по id без новых запросов."""
+        record = resolvers.users.by_username(self.user.username)
+        with self.assertNumQueries(0):
+            self.assertIs(resolvers.users.by_id(self.user.id), record)
+            self.assertIs(
+                resolvers.users.by_username(self.user.username), record)
+        self.assertEqual(record.get_full_name(), 'Иван Петров')
+        self.assertEqual(record.as_user(), self.user)
+
+    def test_record_is_invalidated_on_save(self):
+        """Сохранение пользователя сбрасывает его запись."""
+        resolvers.users.by_id(self.user.id)
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        self.assertEqual(
+            resolvers.users.by_id(self.user.id).first_name, 'Пётр')
+
+    def test_missing_username_raises_404(self):
+        """Несуществующий пользователь даёт 404."""
+        with self.assertRaises(Http404):
+            resolvers.users.by_username('no_such_user')
+
+    def test_follow_unknown_user_is_404(self):
+        """Подписка на несуществующего автора отвечает 404."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'no_such_user'}))
+        self.assertEqual(response.status_code, 404)
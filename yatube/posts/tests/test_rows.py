@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import EXCERPT_LENGTH, FeedEntry, Group, Post
+from posts.paginators import RowPaginator
+from posts.rows import FeedRow, build_rows, feed_values
+
+User = get_user_model()
+
+
+class FeedRowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test_user', first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        cls.long_post = Post.objects.create(
+            text='слово ' * 200, author=cls.user, group=cls.group)
+        cls.short_post = Post.objects.create(
+            text='Короткий пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rows_carry_card_fields(self):
+        """Строки ленты несут поля карточки и экземпляры автора и группы."""
+        rows = build_rows(feed_values(FeedEntry.objects.order_by('post_id')))
+        self.assertTrue(all(isinstance(row, FeedRow) for row in rows))
+        long_row, short_row = rows
+        self.assertEqual(short_row.text, 'Короткий пост')
+        self.assertLessEqual(len(long_row.text), EXCERPT_LENGTH)
+        self.assertTrue(self.long_post.text.startswith(long_row.text[:-1]))
+        self.assertEqual(long_row.author, self.user)
+        self.assertEqual(long_row.author.get_full_name(), 'Имя Фамилия')
+        self.assertIs(long_row.author, short_row.author)
+        self.assertEqual(long_row.group, self.group)
+        self.assertIsNone(short_row.group)
+        self.assertFalse(short_row.image)
+
+    def test_feed_shows_excerpt_detail_full_text(self):
+        """Лента показывает начало текста, страница поста - весь текст."""
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        self.assertNotContains(response, self.long_post.text)
+        response = client.get(
+            reverse('posts:post_detail', args=[self.long_post.id]))
+        self.assertContains(response, self.long_post.text.strip())
+
+    def test_feed_page_single_select(self):
+        """Страница ленты - один SELECT и подсчёт числа постов."""
+        with self.assertNumQueries(2):
+            Client().get(reverse('posts:index'))
+
+    def test_excerpt_follows_text(self):
+        """Начало текста обновляется при правке и массовом обновлении."""
+        self.short_post.text = 'Исправленный пост'
+        self.short_post.save(update_fields=['text'])
+        Post.objects.filter(pk=self.long_post.pk).update(text='Новый текст')
+        excerpts = Post.objects.order_by('id').values_list(
+            'excerpt', flat=True)
+        self.assertEqual(list(excerpts), ['Новый текст', 'Исправленный пост'])
+
+    def test_page_rows_built_on_demand(self):
+        """Страница не выбирает строки, пока к ним не обратились."""
+        paginator = RowPaginator(feed_values(FeedEntry.objects.all()), 10)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(page), 2)
+            self.assertEqual(page[0].pk, self.short_post.pk)
+
+    def test_rebuild_excerpts_command(self):
+        """rebuild_excerpts заполняет пустые excerpt пачками."""
+        Post.objects.update(excerpt='')
+        out = StringIO()
+        call_command('rebuild_excerpts', chunk=1, stdout=out)
+        self.short_post.refresh_from_db()
+        self.assertEqual(self.short_post.excerpt, 'Короткий пост')
+        self.assertIn('Обновлено постов: 2', out.getvalue())
+
+    def test_bench_feed_command(self):
+        """bench_feed печатает замеры и не оставляет данных."""
+        out = StringIO()
+        call_command('bench_feed', repeat=1, stdout=out)
+        self.assertIn('FeedRow', out.getvalue())
+        self.assertEqual(Post.objects.count(), 2)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import StoredFile
+from posts.models import Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(os.path.join(MEDIA_ROOT, 'posts'), ignore_errors=True)
+
+    def create_post(self, name, content=SMALL_GIF):
+        return Post.objects.create(
+            text='Тестовый текст поста',
+            author=self.user,
+            image=SimpleUploadedFile(name, content, 'image/gif')
+        )
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        self.assertEqual(first.image.name, 'posts/first.gif')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(os.listdir(os.path.join(MEDIA_ROOT, 'posts')),
+                         ['first.gif'])
+        self.assertEqual(StoredFile.objects.get().refs, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется вместе с последним ссылающимся постом."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_replaced_image_is_released(self):
+        """Замена картинки снимает ссылку со старого файла."""
+        post = self.create_post('first.gif')
+        path = post.image.path
+        post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'\x00', 'image/gif')
+        post.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(StoredFile.objects.get().name, 'posts/other.gif')
+
+    def test_same_image_reuploaded(self):
+        """Повторная загрузка той же картинки в пост не копит ссылки."""
+        post = self.create_post('first.gif')
+        post.image = SimpleUploadedFile('again.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        self.assertEqual(post.image.name, 'posts/first.gif')
+        self.assertEqual(StoredFile.objects.get().refs, 1)
+        path = post.image.path
+        post.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_unmanaged_files_are_kept(self):
+        """Файлы, загруженные в обход учёта, не удаляются."""
+        path = os.path.join(MEDIA_ROOT, 'posts', 'legacy.gif')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as legacy:
+            legacy.write(SMALL_GIF)
+        Post.objects.create(
+            text='Тестовый текст поста',
+            author=self.user,
+            image='posts/legacy.gif'
+        ).delete()
+        self.assertTrue(os.path.exists(path))
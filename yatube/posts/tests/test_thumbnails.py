@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def small_gif(color):
+    return (
+        b'\x47\x49\x46\x38\x39\x61\x02\x00'
+        b'\x01\x00\x80\x00\x00\x00\x00\x00'
+        b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+        b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+        b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+        b'\x0A\x00\x3B' + bytes([color])
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BulkThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.user,
+                image=SimpleUploadedFile(
+                    f'image{number}.gif', small_gif(number), 'image/gif')
+            )
+            for number in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def images(self):
+        return [post.image for post in self.posts]
+
+    def test_same_files_as_thumbnail_tag(self):
+        """Миниатюры совпадают с теми, что строит get_thumbnail."""
+        resolved = thumbnails.resolve(self.images())
+        for image in self.images():
+            self.assertEqual(
+                resolved[image.name].url,
+                get_thumbnail(
+                    image,
+                    thumbnails.CARD_GEOMETRY,
+                    **thumbnails.CARD_OPTIONS
+                ).url
+            )
+
+    def test_page_resolved_with_one_lookup(self):
+        """Построенные миниатюры страницы читаются одним запросом,
+        а из кэша - без запросов."""
+        thumbnails.resolve(self.images())
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.resolve(self.images())
+        with self.assertNumQueries(0):
+            resolved = thumbnails.resolve(self.images())
+        self.assertEqual(len(resolved), 3)
+
+    def test_feed_shows_thumbnails(self):
+        """Карточки ленты показывают миниатюры."""
+        resolved = thumbnails.resolve(self.images())
+        response = Client().get(reverse('posts:index'))
+        for thumbnail in resolved.values():
+            self.assertContains(response, thumbnail.url)
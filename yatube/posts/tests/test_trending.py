@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Group, Post, Trend
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(
+            text='Тихий пост',
+            author=cls.author,
+        )
+        cls.hot_post = Post.objects.create(
+            text='Популярный пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comment_bumps_post_and_group(self):
+        """Комментарий поднимает пост и его группу."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.hot_post.id}),
+            data={'text': 'Комментарий'},
+        )
+        self.assertTrue(Trend.objects.filter(post=self.hot_post).exists())
+        self.assertTrue(Trend.objects.filter(group=self.group).exists())
+
+    def test_follow_bumps_latest_post(self):
+        """Подписка поднимает последний пост автора."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': self.author.username}))
+        self.assertTrue(Trend.objects.filter(post=self.hot_post).exists())
+
+    def test_score_accumulates(self):
+        """Повторные события увеличивают рейтинг."""
+        trending.bump_post(self.quiet_post)
+        trending.bump_post(self.hot_post)
+        trending.bump_post(self.hot_post)
+        posts, groups = trending.trending(10)
+        self.assertEqual(posts, [self.hot_post, self.quiet_post])
+        self.assertEqual(groups, [self.group])
+
+    def test_log_add(self):
+        """Сложение в логарифмической шкале не теряет точность."""
+        self.assertAlmostEqual(trending._log_add(3, 3), 4)
+        self.assertAlmostEqual(trending._log_add(1000, 0), 1000)
+
+    def test_compact_keeps_top(self):
+        """Уплотнение оставляет только верхушку рейтинга."""
+        trending.bump_post(self.quiet_post)
+        trending.bump_post(self.hot_post, weight=10)
+        trending.compact(size=1)
+        self.assertEqual(
+            list(Trend.objects.filter(post__isnull=False)
+                 .values_list('post', flat=True)),
+            [self.hot_post.id]
+        )
+
+    def test_trending_page(self):
+        """Страница популярного использует свой шаблон."""
+        trending.bump_post(self.hot_post)
+        response = self.authorized_client.get(reverse('posts:trending'))
+        self.assertTemplateUsed(response, 'posts/trending.html')
+        self.assertEqual(response.context['posts'], [self.hot_post])
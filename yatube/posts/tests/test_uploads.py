@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.uploadhandlers import ImageUploadHandler, RejectedUpload
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, content, name='image.gif'):
+        return self.authorized_client.post(reverse('posts:create_post'), {
+            'text': 'Тестовый текст поста',
+            'image': SimpleUploadedFile(name, content, 'image/gif'),
+        })
+
+    def assertRejected(self, response, message):
+        self.assertFalse(Post.objects.exists())
+        self.assertIn(message, response.context['form'].errors['image'][0])
+
+    def test_valid_image_accepted(self):
+        """Допустимая картинка сохраняется."""
+        self.upload(SMALL_GIF)
+        self.assertTrue(Post.objects.filter(image='posts/image.gif').exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=16)
+    def test_too_large_file_rejected(self):
+        """Файл больше лимита отклоняется."""
+        self.assertRejected(self.upload(SMALL_GIF), 'Файл больше')
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с разрешением больше лимита отклоняется."""
+        self.assertRejected(self.upload(SMALL_GIF), 'мегапикселей')
+
+    def test_not_image_rejected(self):
+        """Файл, не являющийся картинкой, отклоняется."""
+        self.assertRejected(self.upload(b'not an image'), 'не является')
+
+    def test_unsupported_format_rejected(self):
+        """Формат не из IMAGE_UPLOAD_FORMATS отклоняется."""
+        bmp = BytesIO()
+        Image.new('RGB', (2, 1)).save(bmp, 'BMP')
+        self.assertRejected(
+            self.upload(bmp.getvalue(), 'image.bmp'), 'не поддерживается')
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=512)
+    def test_rejected_data_not_passed_on(self):
+        """После отказа данные не передаются следующим обработчикам."""
+        handler = ImageUploadHandler()
+        handler.new_file('image', 'image.gif', 'image/gif', None)
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 1024, 0))
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 1024, 1024))
+        rejected = handler.file_complete(2048)
+        self.assertIsInstance(rejected, RejectedUpload)
+        self.assertEqual(rejected.size, 0)
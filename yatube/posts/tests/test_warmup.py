@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from posts import bundles, resolvers, warmup
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class WarmupTests(TransactionTestCase):
+    """Страницы рендерятся в потоках пула, поэтому данные закоммичены."""
+
+    def setUp(self):
+        cache.clear()
+        resolvers.users.cache.clear()
+        resolvers.groups.cache.clear()
+        self.user = User.objects.create_user(username='test_user')
+        self.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test_slug',
+            description='Тестовое описание группы'
+        )
+        self.post = Post.objects.create(
+            text='Тестовый текст поста', author=self.user, group=self.group)
+
+    def test_targets(self):
+        """В прогрев попадают лента, группы, профили и посты."""
+        urls = warmup.targets(pages=2, groups=5, profiles=5, posts=5)
+        expected = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        ]
+        for url in expected:
+            with self.subTest(url=url):
+                self.assertIn(url, urls)
+
+    def test_warm_fills_caches(self):
+        """После прогрева пакет поста и автор уже в кэше."""
+        urls = warmup.targets(pages=1, groups=5, profiles=5, posts=5)
+        reports = []
+        results = warmup.warm(
+            urls, 2, lambda *report: reports.append(report))
+        self.assertEqual(
+            sorted(status for _, status, _ in results), [200] * len(urls))
+        self.assertEqual([report[0] for report in reports],
+                         list(range(1, len(urls) + 1)))
+        self.assertIsNotNone(cache.get(bundles.bundle_key(self.post.id)))
+        self.assertIsNotNone(
+            resolvers.users.cache.get(('username', self.user.username)))
+
+    def test_command_reports_progress(self):
+        """Команда печатает ход прогрева и итог."""
+        out = StringIO()
+        call_command('warm_cache', '--concurrency', '2', stdout=out,
+                     stderr=StringIO())
+        output = out.getvalue()
+        self.assertIn('[1/', output)
+        self.assertIn('Прогрето страниц', output)
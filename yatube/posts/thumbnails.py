@@ -0,0 +1,80 @@
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+logger = logging.getLogger(__name__)
+
+# Миниатюра карточки; такую же строит posts/post_detail.html.
+CARD_GEOMETRY = '960x339'
+CARD_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def _thumbnail_file(image, geometry, options):
+    """Файл миниатюры под тем же именем, что даёт get_thumbnail."""
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def _lookup(keys):
+    """Записи KV-хранилища sorl: один get_many и не больше одного запроса."""
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'cache'):
+        values = {key: kvstore._get_raw(key) for key in keys}
+    else:
+        values = kvstore.cache.get_many(keys)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            stored = dict(
+                KVStore.objects.filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            kvstore.cache.set_many(stored, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(stored)
+    # Пустые значения кэша sorl (EMPTY_VALUE) - тоже промахи.
+    return {
+        key: value for key, value in values.items()
+        if isinstance(value, str)
+    }
+
+
+def resolve(images, geometry=CARD_GEOMETRY, **options):
+    """Миниатюры для набора картинок: {имя картинки: ImageFile}.
+
+    Вместо отдельного обращения к KV-хранилищу на каждый тег
+    {% thumbnail %} имена всех миниатюр вычисляются заранее и читаются
+    разом. Только ещё не построенные миниатюры идут через get_thumbnail.
+    """
+    options = options or CARD_OPTIONS
+    sources = {image.name: image for image in images if image}
+    keys = {
+        add_prefix(_thumbnail_file(image, geometry, options).key): name
+        for name, image in sources.items()
+    }
+    values = _lookup(list(keys))
+    thumbnails = {}
+    for key, name in keys.items():
+        if key in values:
+            thumbnails[name] = deserialize_image_file(values[key])
+            continue
+        try:
+            thumbnails[name] = get_thumbnail(
+                sources[name], geometry, **options)
+        except Exception:
+            logger.exception('Не удалось построить миниатюру %s', name)
+    return thumbnails
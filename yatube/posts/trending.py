@@ -0,0 +1,97 @@
+import math
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, Trend
+
+HALF_LIFE_HOURS: int = 24
+TRENDING_SIZE: int = 100
+COMPACT_EVERY: int = 500
+COMMENT_WEIGHT: float = 1.0
+FOLLOW_WEIGHT: float = 3.0
+
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+EVENTS_KEY = 'trending:events'
+
+
+def _log_weight(weight, now=None):
+    """Вклад события в рейтинг в логарифмической шкале."""
+    now = now or timezone.now()
+    hours = (now - EPOCH).total_seconds() / 3600
+    return hours / HALF_LIFE_HOURS + math.log2(weight)
+
+
+def _log_add(a, b):
+    """log2(2 ** a + 2 ** b) без переполнения."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _bump(weight, **target):
+    value = _log_weight(weight)
+    with transaction.atomic():
+        trend, created = (
+            Trend.objects.select_for_update()
+            .get_or_create(defaults={'score': value}, **target)
+        )
+        if not created:
+            trend.score = _log_add(trend.score, value)
+            trend.save(update_fields=['score', 'updated'])
+
+
+def _count_event():
+    cache.add(EVENTS_KEY, 0, None)
+    if cache.incr(EVENTS_KEY) % COMPACT_EVERY == 0:
+        compact()
+
+
+def bump_post(post, weight=COMMENT_WEIGHT):
+    """Учитывает событие для поста и его группы."""
+    _bump(weight, post=post)
+    if post.group_id:
+        _bump(weight, group_id=post.group_id)
+    _count_event()
+
+
+def bump_author(author_id, weight=FOLLOW_WEIGHT):
+    """Подписка на автора поднимает его последний пост."""
+    post = (
+        Post.objects.filter(author_id=author_id)
+        .only('id', 'group').first()
+    )
+    if post is not None:
+        bump_post(post, weight)
+
+
+def compact(size=TRENDING_SIZE):
+    """Оставляет в таблице не больше `size` записей каждого вида."""
+    for kind in ('post', 'group'):
+        trends = Trend.objects.filter(**{f'{kind}__isnull': False})
+        threshold = (
+            trends.order_by('-score')
+            .values_list('score', flat=True)[size:size + 1]
+        )
+        if threshold:
+            trends.filter(score__lte=threshold[0]).delete()
+
+
+def trending(limit):
+    """Популярные посты и группы одним чтением по индексу `score`.
+
+    После уплотнения таблица ограничена, поэтому её верхушка читается
+    целиком и делится на посты и группы уже в памяти.
+    """
+    trends = (
+        Trend.objects.select_related('post__author', 'post__group', 'group')
+        .order_by('-score')[:TRENDING_SIZE * 2]
+    )
+    posts, groups = [], []
+    for trend in trends:
+        if trend.post_id:
+            posts.append(trend.post)
+        else:
+            groups.append(trend.group)
+    return posts[:limit], groups[:limit]
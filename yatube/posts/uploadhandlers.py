@@ -0,0 +1,85 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+# Сколько начала файла держать в памяти, чтобы Pillow прочитал заголовок.
+HEADER_LIMIT = 256 * 1024
+
+IMAGE_ERRORS = (OSError, SyntaxError, ValueError, EOFError)
+
+
+class RejectedUpload(UploadedFile):
+    """Файл, отклонённый при загрузке; форма превращает его в ошибку."""
+
+    def __init__(self, name, error):
+        super().__init__(BytesIO(), name, size=0)
+        self.error = error
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Проверяет загружаемые картинки, пока они ещё передаются.
+
+    Стоит первым в FILE_UPLOAD_HANDLERS и передаёт данные дальше по
+    цепочке, пока файл укладывается в IMAGE_UPLOAD_MAX_SIZE, а его
+    заголовок описывает картинку допустимого формата не больше
+    IMAGE_UPLOAD_MAX_PIXELS. Пиксели при этом не декодируются. Как
+    только условие нарушено, остаток файла отбрасывается, а форме
+    вместо файла приходит RejectedUpload.
+    """
+    chunk_size = 64 * 1024
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.header = b''
+        self.identified = False
+        self.error = None
+        if self.content_length is not None:
+            self.check_size(self.content_length)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error is None:
+            self.size += len(raw_data)
+            self.check_size(self.size)
+        if self.error is None and not self.identified:
+            self.header += raw_data
+            self.identify(final=len(self.header) >= HEADER_LIMIT)
+        if self.error is not None:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.error is None and not self.identified:
+            self.identify(final=True)
+        self.header = b''
+        if self.error is not None:
+            return RejectedUpload(self.file_name, self.error)
+        return None
+
+    def check_size(self, size):
+        if size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.error = 'Файл больше {}.'.format(
+                filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE))
+
+    def identify(self, final):
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                image_format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            image_format, width, height = None, 0, 0
+        except IMAGE_ERRORS:
+            if final:
+                self.error = 'Файл не является картинкой.'
+            return
+        self.identified = True
+        self.header = b''
+        if image_format is None or (
+                width * height > settings.IMAGE_UPLOAD_MAX_PIXELS):
+            self.error = 'Картинка больше {} мегапикселей.'.format(
+                settings.IMAGE_UPLOAD_MAX_PIXELS // 1_000_000)
+        elif image_format not in settings.IMAGE_UPLOAD_FORMATS:
+            self.error = 'Формат {} не поддерживается.'.format(image_format)
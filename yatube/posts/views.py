@@ -1,17 +1,23 @@
-from django.core.paginator import Paginator
 from django.shortcuts import redirect, render, get_object_or_404
-from .models import Post, Group, User, Comment, Follow
+from .models import FeedEntry, Follow, Post
 from .forms import PostForm, CommentForm
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
+from . import trending as trends
+from . import resolvers, tasks
+from .bundles import comments_page, get_bundle
+from .directory import group_directory
+from .paginators import FeedRowPaginator, RowPaginator
+from .rows import feed_values
+from core.tasks import enqueue
 
 
 number_of_elements: int = 10
 
 
 def index(request):
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, number_of_elements)
+    post_list = feed_values(FeedEntry.objects.all())
+    paginator = RowPaginator(post_list, number_of_elements)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
@@ -22,64 +28,78 @@ def index(request):
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('group')
-    paginator = Paginator(post_list, number_of_elements)
+    group = resolvers.groups.get_or_404(slug)
+    post_list = feed_values(FeedEntry.objects.filter(group_id=group.id))
+    paginator = FeedRowPaginator(
+        post_list,
+        number_of_elements,
+        count=group.posts_count,
+        after=request.GET.get('after')
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
         'group': group,
-        'posts': post_list,
         'page_obj': page_obj
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request):
+    page_obj = group_directory(number_of_elements, request.GET.get('after'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def profile(request, username):
-    username = get_object_or_404(User, username=username)
-    profile_post_list = (Post.objects.filter(author=username)
-                         .order_by('-pub_date'))
-    paginator = Paginator(profile_post_list, number_of_elements)
+    author = resolvers.users.by_username(username)
+    profile_post_list = FeedEntry.objects.filter(author_id=author.id)
+    paginator = RowPaginator(
+        feed_values(profile_post_list), number_of_elements)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     number_of_posts = profile_post_list.count()
     is_profile = True
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=username
-        ).exists()
     context = {
         'page_obj': page_obj,
         'profile': profile_post_list,
-        'username': username,
+        'username': author.as_user(),
         'number_of_posts': number_of_posts,
         'is_profile': is_profile,
-        'following': following
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    username = get_object_or_404(User, id=post.author_id)
-    number_of_posts = Post.objects.filter(author=username).count()
-    group = post.group
-    title = post.text[:30]
-    form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+    bundle = get_bundle(post_id)
+    post = bundle['post']
+    # Пустая форма ничего не стоит, а шаблон выводит её
+    # только авторизованным пользователям.
+    form = CommentForm()
     context = {
         'post': post,
-        'username': username,
-        'title': title,
-        'number_of_posts': number_of_posts,
-        'group': group,
+        'username': bundle['author'],
+        'title': post.text[:30],
+        'number_of_posts': bundle['number_of_posts'],
+        'group': post.group,
         'form': form,
-        'comments': comments
+        'comments': comments_page(
+            post_id, bundle, request.GET.get('page')),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def trending(request):
+    posts, groups = trends.trending(number_of_elements)
+    context = {
+        'posts': posts,
+        'groups': groups,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -124,13 +144,15 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        enqueue(tasks.bump_post, post.id)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, number_of_elements)
+    authors = Follow.objects.authors_followed_by(request.user.id)
+    post_list = feed_values(FeedEntry.objects.filter(author_id__in=authors))
+    paginator = RowPaginator(post_list, number_of_elements)
     page_number = request.GET.get('page_obj')
     page_obj = paginator.get_page(page_number)
     context = {'page_obj': page_obj}
@@ -140,17 +162,17 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     user = request.user
-    author = User.objects.get(username=username)
-    is_follower = Follow.objects.filter(user=user, author=author)
-    if user != author and not is_follower.exists():
-        Follow.objects.create(user=user, author=author)
+    author = resolvers.users.by_username(username)
+    following = Follow.objects.authors_followed_by(user.id)
+    if user.id != author.id and author.id not in following:
+        Follow.objects.create(user=user, author_id=author.id)
+        enqueue(tasks.bump_author, author.id)
     return redirect(reverse('posts:profile', args=[username]))
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=request.user, author=author)
-    if is_follower.exists():
-        is_follower.delete()
+    author = resolvers.users.by_username(username)
+    if author.id in Follow.objects.authors_followed_by(request.user.id):
+        Follow.objects.filter(user=request.user, author_id=author.id).delete()
     return redirect('posts:profile', username=author)
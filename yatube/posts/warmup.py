@@ -0,0 +1,142 @@
+"""Прогрев кэшей после деплоя или перезапуска.
+
+Страницы рендерятся теми же представлениями, что и для гостя, без
+HTTP и middleware: так наполняются все кэши, которые они используют
+(фрагменты страниц, карточки, пакеты постов, выборки, резолверы,
+фильтры Блума). LocMemCache у каждого процесса свой, поэтому при нём
+прогревать нужно в самом воркере - это делает start() при
+WARMUP_ON_BOOT.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Thread
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Count
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .models import FeedEntry, Group, User
+from .trending import trending
+
+logger = logging.getLogger(__name__)
+
+
+def _top_up(chosen, more, limit):
+    """Первые `limit` разных значений: сначала chosen, потом more."""
+    result = list(dict.fromkeys(chosen))[:limit]
+    for value in more:
+        if len(result) >= limit:
+            break
+        if value not in result:
+            result.append(value)
+    return result
+
+
+def targets(pages, groups, profiles, posts):
+    """URL для прогрева: начало ленты, популярные группы, авторы и посты.
+
+    Популярность берётся из рейтинга trending; если его не хватает,
+    добавляются самые большие группы, авторы с большим числом
+    подписчиков и свежие посты.
+    """
+    popular_posts, popular_groups = trending(max(groups, posts, profiles))
+    slugs = _top_up(
+        [group.slug for group in popular_groups],
+        Group.objects.order_by('-posts_count')
+        .values_list('slug', flat=True)[:groups],
+        groups,
+    )
+    usernames = _top_up(
+        [post.author.username for post in popular_posts],
+        User.objects.annotate(followers=Count('following'))
+        .order_by('-followers').values_list('username', flat=True)[:profiles],
+        profiles,
+    )
+    post_ids = _top_up(
+        [post.id for post in popular_posts],
+        FeedEntry.objects.values_list('post_id', flat=True)[:posts],
+        posts,
+    )
+    index = reverse('posts:index')
+    urls = [index] + [f'{index}?page={page}' for page in range(2, pages + 1)]
+    urls += [reverse('posts:group_index'), reverse('posts:trending')]
+    urls += [reverse('posts:group_posts', args=[slug]) for slug in slugs]
+    urls += [
+        reverse('posts:profile', args=[username]) for username in usernames
+    ]
+    urls += [
+        reverse('posts:post_detail', args=[post_id]) for post_id in post_ids
+    ]
+    return urls
+
+
+def render(url):
+    """Рендерит страницу как для гостя; возвращает (статус, секунды)."""
+    started = time.monotonic()
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    try:
+        status = match.func(request, *match.args, **match.kwargs).status_code
+    except Http404:
+        status = 404
+    finally:
+        # Соединения потока пула больше никому не нужны.
+        connections.close_all()
+    return status, time.monotonic() - started
+
+
+def warm(urls, concurrency, progress=None):
+    """Рендерит urls не более чем в `concurrency` потоков.
+
+    progress(готово, всего, url, статус, секунды) вызывается после
+    каждой страницы; статус None - страница упала.
+    """
+    results = []
+    with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='warmup') as pool:
+        futures = {pool.submit(render, url): url for url in urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            url = futures[future]
+            try:
+                status, seconds = future.result()
+            except Exception:
+                logger.exception('Прогрев %s не удался', url)
+                status, seconds = None, 0.0
+            results.append((url, status, seconds))
+            if progress is not None:
+                progress(done, len(urls), url, status, seconds)
+    return results
+
+
+def warm_default():
+    urls = targets(
+        settings.WARMUP_PAGES,
+        settings.WARMUP_GROUPS,
+        settings.WARMUP_PROFILES,
+        settings.WARMUP_POSTS,
+    )
+    started = time.monotonic()
+    results = warm(urls, settings.WARMUP_CONCURRENCY)
+    failed = sum(status is None for _, status, _ in results)
+    logger.info(
+        'Кэш прогрет: %s страниц за %.1f с, ошибок: %s',
+        len(results), time.monotonic() - started, failed)
+
+
+def start():
+    """Прогрев в фоне, чтобы воркер сразу начал принимать запросы."""
+    def run():
+        try:
+            warm_default()
+        except Exception:
+            logger.exception('Прогрев кэша не удался')
+        finally:
+            connections.close_all()
+
+    Thread(target=run, name='warmup', daemon=True).start()
@@ -0,0 +1,306 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.2 has no ASGI handler and no async views, so the WSGI application
+is wrapped: the request body is received by the event loop without holding
+a thread, the view runs in a bounded thread pool (ASGI_THREADS), and the
+response is streamed back to slow clients from the loop as well. Views stay
+synchronous: at most ASGI_THREADS of them run at once, as with a threaded
+WSGI server.
+
+File responses go through ``wsgi.file_wrapper``: the pool thread is released
+as soon as the view returns, and the loop sends the file itself, with
+``http.response.zerocopysend`` when the server supports it. A client that
+disconnects stops a streaming response at its next chunk.
+
+Run with any ASGI server, e.g. ``uvicorn yatube.asgi:application``.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+# Сколько кусков ответа ждут отправки, пока поток не притормозит.
+RESPONSE_BUFFER: int = 16
+FILE_BLOCK_SIZE: int = 64 * 1024
+ZEROCOPY = 'http.response.zerocopysend'
+
+_DONE = object()
+
+
+class FileWrapper:
+    """wsgi.file_wrapper: файл ответа отправляет цикл событий, а не поток."""
+
+    def __init__(self, filelike, block_size=FILE_BLOCK_SIZE):
+        self.filelike = filelike
+        self.block_size = block_size
+
+    def __iter__(self):
+        while True:
+            data = self.filelike.read(self.block_size)
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        if hasattr(self.filelike, 'close'):
+            self.filelike.close()
+
+
+def _discard(chunk):
+    if isinstance(chunk, FileWrapper):
+        chunk.close()
+
+
+class WsgiToAsgi:
+    """ASGI-приложение, выполняющее WSGI-приложение в пуле потоков."""
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Unsupported scope type {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        response = Response(
+            loop, zerocopy=ZEROCOPY in (scope.get('extensions') or {}))
+        environ = self.environ(scope, body)
+        future = loop.run_in_executor(
+            self.executor, self.run_wsgi, environ, response)
+        watcher = asyncio.ensure_future(
+            self.watch_disconnect(receive, response))
+        try:
+            await response.send_to(send)
+        except BaseException:
+            # Ошибка отправки или отмена: поток не должен навсегда
+            # застрять в put() на полной очереди.
+            response.abort()
+            raise
+        finally:
+            watcher.cancel()
+            await future
+            body.close()
+
+    @staticmethod
+    async def watch_disconnect(receive, response):
+        # После тела сервер присылает только http.disconnect.
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            response.abort()
+
+    @staticmethod
+    async def read_body(receive):
+        """Тело запроса; большое уходит во временный файл."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    @staticmethod
+    def environ(scope, body):
+        script_name = scope.get('root_path', '')
+        path = scope['path']
+        if script_name and path.startswith(script_name):
+            path = path[len(script_name):]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': script_name.encode().decode('latin-1'),
+            'PATH_INFO': path.encode().decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'REMOTE_ADDR': client[0],
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            'wsgi.file_wrapper': FileWrapper,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            if name in environ:
+                value = f'{environ[name]},{value}'
+            environ[name] = value
+        return environ
+
+    def run_wsgi(self, environ, response):
+        # Весь запрос, включая close() и request_finished, идёт в одном
+        # потоке: соединения с базой у Django привязаны к потоку.
+        try:
+            result = self.wsgi_application(environ, response.start_response)
+            if isinstance(result, FileWrapper):
+                # Файл дочитает и закроет send_to: поток свободен сразу.
+                response.put(result)
+                return
+            try:
+                for chunk in result:
+                    if response.disconnected:
+                        break
+                    if chunk:
+                        response.put(chunk)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            response.put(_DONE)
+
+
+class Response:
+    """Передаёт статус, заголовки и тело из потока в цикл событий."""
+
+    def __init__(self, loop, zerocopy=False):
+        self.loop = loop
+        self.zerocopy = zerocopy
+        self.queue = asyncio.Queue(RESPONSE_BUFFER)
+        self.status = None
+        self.headers = None
+        self.content_length = None
+        self.disconnected = False
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+        for name, value in headers:
+            if name.lower() == 'content-length':
+                self.content_length = int(value)
+
+    def put(self, chunk):
+        # _DONE нужен send_to даже после обрыва: он ждёт конца потока.
+        if self.disconnected and chunk is not _DONE:
+            _discard(chunk)
+            return
+        asyncio.run_coroutine_threadsafe(
+            self.queue.put(chunk), self.loop).result()
+
+    def abort(self):
+        """Ответ больше не отправляется: освобождает ждущий поток."""
+        self.disconnected = True
+        done = False
+        while not self.queue.empty():
+            chunk = self.queue.get_nowait()
+            if chunk is _DONE:
+                done = True
+            else:
+                _discard(chunk)
+        if done:
+            self.queue.put_nowait(_DONE)
+
+    async def send_to(self, send):
+        started = False
+        while True:
+            chunk = await self.queue.get()
+            if chunk is _DONE:
+                break
+            if self.disconnected:
+                _discard(chunk)
+                continue
+            try:
+                if not started:
+                    await self.start(send)
+                    started = True
+                if isinstance(chunk, FileWrapper):
+                    await self.send_file(send, chunk)
+                else:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            except OSError:
+                # Клиент ушёл: дочитываем очередь, чтобы поток не завис.
+                self.disconnected = True
+            finally:
+                _discard(chunk)
+        if not self.disconnected:
+            if not started:
+                await self.start(send)
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def send_file(self, send, wrapper):
+        filelike = wrapper.filelike
+        if self.zerocopy and hasattr(filelike, 'fileno'):
+            message = {
+                'type': ZEROCOPY,
+                'file': filelike,
+                'offset': filelike.tell(),
+                'more_body': True,
+            }
+            if self.content_length is not None:
+                message['count'] = self.content_length
+            await send(message)
+            return
+        while not self.disconnected:
+            # Чтение с диска - в стандартном пуле цикла, не в ASGI_THREADS.
+            data = await self.loop.run_in_executor(
+                None, filelike.read, wrapper.block_size)
+            if not data:
+                return
+            await send({
+                'type': 'http.response.body',
+                'body': data,
+                'more_body': True,
+            })
+
+    async def start(self, send):
+        # Без статуса - приложение упало, не начав ответ.
+        await send({
+            'type': 'http.response.start',
+            'status': self.status or 500,
+            'headers': self.headers or [],
+        })
+
+
+application = WsgiToAsgi(get_wsgi_application(), settings.ASGI_THREADS)
+
+if settings.WARMUP_ON_BOOT:
+    from posts import warmup
+    warmup.start()
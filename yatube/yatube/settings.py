@@ -43,7 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'users.apps.UsersConfig',
-    'core',
+    'core.apps.CoreConfig',
     'about',
     'sorl.thumbnail',
     'posts.apps.PostsConfig'
@@ -51,10 +51,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.LateFragmentMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -93,9 +96,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами вместо переоткрытия
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # Сколько секунд ждать снятия блокировки записи
+            'timeout': 20,
+        },
     }
 }
 
+# Реплики для чтения лент, профилей и постов, например:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_APPS = ('posts', 'auth')
+# Сколько секунд после записи пользователь читает только из default
+REPLICATION_LAG = 5
+
+# Выполняются для каждого нового соединения (core.db.configure_sqlite).
+# WAL позволяет читателям не ждать писателей, NORMAL в режиме WAL
+# безопасен для целостности и сильно ускоряет запись.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -137,6 +171,17 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+if not DEBUG:
+    # Имена с хешем содержимого и готовые .gz/.br после collectstatic
+    STATICFILES_STORAGE = (
+        'core.storage.CompressedManifestStaticFilesStorage')
+
+# Отдавать собранную статику из Django (core.views.serve_static),
+# если перед приложением нет nginx
+SERVE_STATIC = False
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -151,9 +196,63 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Отдавать медиа из Django и в боевом режиме (core.views.serve_media)
+SERVE_MEDIA = False
+# None - тело отдаёт сам Django с поддержкой Range и sendfile через
+# wsgi.file_wrapper; 'x-accel-redirect' - nginx из internal-локации
+# MEDIA_OFFLOAD_LOCATION; 'x-sendfile' - Apache/lighttpd
+MEDIA_OFFLOAD = None
+MEDIA_OFFLOAD_LOCATION = '/protected-media/'
+
+# Загрузки проверяются потоково: размер и формат/разрешение по заголовку,
+# больше FILE_UPLOAD_MAX_MEMORY_SIZE файл пишется во временный файл.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploadhandlers.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+IMAGE_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 24_000_000
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+# Размер пула потоков, в котором yatube.asgi выполняет запросы
+ASGI_THREADS = 32
+
+# Фоновые задачи (core.tasks): при TASKS_EAGER выполняются сразу,
+# иначе их разбирает manage.py run_tasks
+TASKS_EAGER = DEBUG
+TASKS_BATCH = 20
+TASKS_TIMEOUT = 300
+TASKS_RETRY_DELAY = 5
+TASKS_RETRY_MAX_DELAY = 3600
+
+# Сбросы кэшей между процессами (core.invalidation): каждый процесс
+# не чаще раза в INVALIDATION_POLL_INTERVAL секунд читает новые сбросы;
+# под runserver процесс один, и шина не нужна
+INVALIDATION_BUS = not DEBUG
+INVALIDATION_POLL_INTERVAL = 1.0
+INVALIDATION_RETENTION = 3600
+
+# Прогрев кэшей (posts.warmup): manage.py warm_cache, а при
+# WARMUP_ON_BOOT - фоновый поток в каждом воркере после старта
+WARMUP_ON_BOOT = not DEBUG
+WARMUP_PAGES = 3
+WARMUP_GROUPS = 10
+WARMUP_PROFILES = 10
+WARMUP_POSTS = 20
+WARMUP_CONCURRENCY = 4
+
+# LocMemCache у каждого процесса свой: сбросы между процессами разносит
+# core.invalidation, а posts.caching не даёт пересчитывать ключ больше
+# чем одному потоку в каждом процессе. Чтобы ключ пересчитывал один
+# процесс на всех, нужен общий кэш (Memcached, Redis, DatabaseCache).
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
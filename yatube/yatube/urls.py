@@ -16,7 +16,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import serve_media, serve_static
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
@@ -30,7 +31,15 @@ handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        path(
+            f'{settings.STATIC_URL.strip("/")}/<path:path>',
+            serve_static
+        ),
+    ]
+
+if settings.DEBUG or settings.SERVE_MEDIA:
+    urlpatterns += [
+        path(f'{settings.MEDIA_URL.strip("/")}/<path:path>', serve_media),
+    ]